@@ -1,13 +1,74 @@
 from fastapi import APIRouter, File, UploadFile, Form, HTTPException, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, FileResponse
 from pydantic import BaseModel
+import asyncio
+import io
 import subprocess
-import json
+import orjson
 import os
 import shutil
+import stat
+from pathlib import Path
+import anyio
+from cachetools import TTLCache
+from celery import chain
+
+from app.tasks.celery_app import celery_app
+from app.tasks.stage1_tasks import (
+    task_audio_separator,
+    task_diarization,
+    task_overlap_split,
+    task_segment,
+    task_chunk
+)
+from app.tasks.stage2_tasks import process_stage2
+
+try:
+    from yt_dlp import YoutubeDL
+    from yt_dlp.utils import DownloadError
+except ImportError:
+    YoutubeDL = None
+    DownloadError = None
 
 router = APIRouter()
 
+# Upload copy sizes: sendfile moves 4 MiB per syscall, the buffered fallback 1 MiB per read
+SENDFILE_CHUNK_SIZE = 1 << 22
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+# PATH does not change at runtime, so resolve yt-dlp once instead of per request
+_YTDLP_PATH = shutil.which("yt-dlp")
+
+# Task status caches: in-flight states are re-read from Redis at most every
+# 500 ms per task; terminal states hold the task's result payload, so only
+# the most recently polled few are kept, briefly (a forget()/revoke shows
+# up within the TTL)
+_ACTIVE_STATUS_CACHE = TTLCache(maxsize=10000, ttl=0.5)
+_FINAL_STATUS_CACHE = TTLCache(maxsize=256, ttl=30)
+_FINAL_STATES = ("SUCCESS", "FAILURE", "REVOKED")
+
+# /download lookup order, and media types for the files we serve
+# (anything else falls back to Starlette's mimetypes guess)
+_DOWNLOAD_DIRS = (Path("data/outputs"), Path("data/uploads"))
+_DOWNLOAD_MEDIA_TYPES = {
+    ".mp4": "video/mp4",
+    ".wav": "audio/wav",
+    ".mp3": "audio/mpeg",
+    ".m4a": "audio/mp4",
+}
+
+# /youtube/info responses per URL; metadata is stable over an editing session
+_YT_INFO_CACHE = TTLCache(maxsize=1024, ttl=3600)
+
+# Options for in-process metadata lookups (no download, no console output)
+_YTDL_INFO_OPTS = {
+    "quiet": True,
+    "no_warnings": True,
+    "skip_download": True,
+    "noplaylist": True,
+    "socket_timeout": 30,
+}
+
 
 class YouTubeURL(BaseModel):
     url: str
@@ -35,18 +96,51 @@ async def health_check():
     return {"status": "ok", "message": "Auto Dub System is running"}
 
 
-async def _start_pipeline(file_location: str):
-    """Helper to start the Celery pipeline for a given file."""
-    from celery import chain
-    from app.tasks.stage1_tasks import (
-        task_audio_separator,
-        task_diarization,
-        task_overlap_split,
-        task_segment,
-        task_chunk
-    )
-    from app.tasks.stage2_tasks import process_stage2
+def _copy_upload(src, dest: str):
+    """Buffered copy of an upload spool (blocking, run in a worker thread)."""
+    with open(dest, "wb") as buffer:
+        shutil.copyfileobj(src, buffer, length=UPLOAD_CHUNK_SIZE)
+
+
+def _sendfile_upload(src_fd: int, dest: str):
+    """Kernel-side copy of an on-disk upload (blocking, run in a worker thread)."""
+    out_fd = os.open(dest, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        while os.sendfile(out_fd, src_fd, None, SENDFILE_CHUNK_SIZE):
+            pass
+    finally:
+        os.close(out_fd)
+
+
+async def _save_upload(file: UploadFile, dest: str):
+    """
+    Write an uploaded file to dest without blocking the event loop.
+
+    If the upload exposes a real file descriptor, the bytes are copied with
+    os.sendfile. Otherwise (a stream without one, or no sendfile on this
+    platform) the whole copy runs as one copyfileobj call.
+    Either way the copy happens in a single worker-thread hop, so concurrent
+    uploads proceed in parallel instead of queueing on the event loop.
+    """
+    await file.seek(0)
+    src = file.file
+    src_fd = None
+    if hasattr(os, "sendfile"):
+        try:
+            # An in-memory stream has no descriptor (io.UnsupportedOperation).
+            # A SpooledTemporaryFile still in memory rolls over here instead,
+            # which costs at most its small spool size
+            src_fd = src.fileno()
+        except (io.UnsupportedOperation, AttributeError, OSError):
+            src_fd = None
+    if src_fd is not None:
+        await anyio.to_thread.run_sync(_sendfile_upload, src_fd, dest)
+    else:
+        await anyio.to_thread.run_sync(_copy_upload, src, dest)
+
 
+async def _start_pipeline(file_location: str, gender: str = "Male"):
+    """Helper to start the Celery pipeline for a given file."""
     # Flatten the chain for better reliability
     workflow = chain(
         task_audio_separator.s(file_location),
@@ -54,7 +148,7 @@ async def _start_pipeline(file_location: str):
         task_overlap_split.s(),
         task_segment.s(),
         task_chunk.s(file_location),
-        process_stage2.s()
+        process_stage2.s(gender=gender)
     )
     task = workflow.apply_async()
     return task
@@ -74,11 +168,10 @@ async def upload_video(
     # Save file to disk
     os.makedirs("data/uploads", exist_ok=True)
     file_location = f"data/uploads/{file.filename}"
-    with open(file_location, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    await _save_upload(file, file_location)
 
     try:
-        task = await _start_pipeline(file_location)
+        task = await _start_pipeline(file_location, gender)
         return {
             "filename": file.filename,
             "task_id": task.id,
@@ -107,8 +200,7 @@ async def dub_video(
 
     if file is not None:
         file_location = f"data/uploads/{file.filename}"
-        with open(file_location, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        await _save_upload(file, file_location)
     elif youtube_video_path:
         if not os.path.exists(youtube_video_path):
             raise HTTPException(status_code=400, detail=f"YouTube video path not found: {youtube_video_path}")
@@ -117,7 +209,7 @@ async def dub_video(
         raise HTTPException(status_code=422, detail="Either 'file' or 'youtube_video_path' must be provided.")
 
     try:
-        task = await _start_pipeline(file_location)
+        task = await _start_pipeline(file_location, gender)
         return {
             "filename": os.path.basename(file_location),
             "task_id": task.id,
@@ -133,16 +225,25 @@ async def dub_video(
 
 @router.get("/task/{task_id}")
 async def get_task_status(task_id: str):
+    cached = _FINAL_STATUS_CACHE.get(task_id) or _ACTIVE_STATUS_CACHE.get(task_id)
+    if cached is not None:
+        return cached
+
     try:
-        from app.tasks.celery_app import celery_app
         result = celery_app.AsyncResult(task_id)
+        status = result.status
         response = {
             "task_id": task_id,
-            "status": result.status,
-            "result": result.result if result.ready() else None,
+            "status": status,
+            "result": result.result if status in _FINAL_STATES else None,
         }
-        if result.status == "FAILURE":
+        if status == "FAILURE":
             response["error"] = str(result.result)
+
+        if status in _FINAL_STATES:
+            _FINAL_STATUS_CACHE[task_id] = response
+        else:
+            _ACTIVE_STATUS_CACHE[task_id] = response
         return response
     except Exception as e:
         return {"task_id": task_id, "status": "UNKNOWN", "error": str(e)}
@@ -153,29 +254,70 @@ async def get_status(task_id: str):
     return await get_task_status(task_id)
 
 
+async def _run_ytdlp(cmd: list, timeout: float) -> subprocess.CompletedProcess:
+    """
+    Run a yt-dlp command without blocking the event loop.
+
+    Mirrors subprocess.run(cmd, capture_output=True, text=True, timeout=...):
+    returns a CompletedProcess with decoded stdout/stderr and raises
+    subprocess.TimeoutExpired (after killing the child) on timeout.
+    """
+    proc = await asyncio.create_subprocess_exec(
+        *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        raise subprocess.TimeoutExpired(cmd, timeout)
+    return subprocess.CompletedProcess(
+        cmd,
+        proc.returncode,
+        stdout.decode("utf-8", errors="replace"),
+        stderr.decode("utf-8", errors="replace"),
+    )
+
+
+def _extract_youtube_info(url: str) -> dict:
+    """Fetch video metadata with the yt_dlp library (blocking network I/O)."""
+    with YoutubeDL(_YTDL_INFO_OPTS) as ydl:
+        return ydl.extract_info(url, download=False)
+
+
 @router.post("/youtube/info")
 async def youtube_info(data: YouTubeURL):
     if not data.url or not data.url.strip():
         raise HTTPException(status_code=400, detail="URL cannot be empty")
 
-    # Check if yt-dlp is available
-    if not shutil.which("yt-dlp"):
+    cache_key = data.url.strip()
+    cached = _YT_INFO_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+
+    # Check if yt-dlp is available (as a library, or at least as a CLI)
+    if YoutubeDL is None and not _YTDLP_PATH:
         raise HTTPException(
             status_code=500,
             detail="yt-dlp is not installed. Run: pip install yt-dlp"
         )
 
     try:
-        cmd = ["yt-dlp", "-j", "--no-playlist", data.url]
-        result = subprocess.run(
-            cmd, capture_output=True, text=True, timeout=30
-        )
-        if result.returncode != 0:
-            raise HTTPException(
-                status_code=400,
-                detail=f"yt-dlp error: {result.stderr.strip() or 'Unknown error'}"
-            )
-        info = json.loads(result.stdout)
+        if YoutubeDL is not None:
+            # In-process: no fork/exec, interpreter startup or JSON round-trip
+            try:
+                info = await anyio.to_thread.run_sync(_extract_youtube_info, data.url)
+            except DownloadError as e:
+                raise HTTPException(status_code=400, detail=f"yt-dlp error: {str(e) or 'Unknown error'}")
+        else:
+            cmd = [_YTDLP_PATH, "-j", "--no-playlist", data.url]
+            result = await _run_ytdlp(cmd, timeout=30)
+            if result.returncode != 0:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"yt-dlp error: {result.stderr.strip() or 'Unknown error'}"
+                )
+            info = orjson.loads(result.stdout)
 
         formats = [
             {"quality": "1080p", "available": True},
@@ -184,7 +326,7 @@ async def youtube_info(data: YouTubeURL):
             {"quality": "360p", "available": True},
         ]
 
-        return {
+        response = {
             "status": "success",
             "data": {
                 "title": info.get("title", "Unknown Title"),
@@ -194,11 +336,13 @@ async def youtube_info(data: YouTubeURL):
                 "formats": formats,
             },
         }
+        _YT_INFO_CACHE[cache_key] = response
+        return response
     except HTTPException:
         raise
     except subprocess.TimeoutExpired:
         raise HTTPException(status_code=408, detail="Request timed out fetching video info")
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         raise HTTPException(status_code=500, detail="Failed to parse video info response")
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to fetch YouTube info: {str(e)}")
@@ -206,7 +350,7 @@ async def youtube_info(data: YouTubeURL):
 
 @router.post("/youtube/download")
 async def youtube_download(data: YouTubeDownload):
-    if not shutil.which("yt-dlp"):
+    if not _YTDLP_PATH:
         raise HTTPException(
             status_code=500,
             detail="yt-dlp is not installed. Run: pip install yt-dlp"
@@ -216,26 +360,26 @@ async def youtube_download(data: YouTubeDownload):
         output_tmpl = "data/uploads/%(title)s_%(id)s.%(ext)s"
 
         cmd = [
-            "yt-dlp",
+            _YTDLP_PATH,
             "-f", "bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best",
             "--merge-output-format", "mp4",
             "-o", output_tmpl,
+            # Print the final path once the file is in place, so a single run
+            # both downloads and tells us where the output went
+            "--print", "after_move:filepath",
+            "--no-simulate",
             data.url,
         ]
 
-        # Get filename first
-        result = subprocess.run(
-            cmd + ["--get-filename"], capture_output=True, text=True, timeout=30
-        )
-        if result.returncode != 0:
-            raise HTTPException(status_code=400, detail=f"yt-dlp error: {result.stderr.strip()}")
-        filename_abs = result.stdout.strip()
-
-        # Run actual download
-        dl_result = subprocess.run(cmd, capture_output=True, text=True, timeout=600)
+        dl_result = await _run_ytdlp(cmd, timeout=600)
         if dl_result.returncode != 0:
             raise HTTPException(status_code=400, detail=f"Download failed: {dl_result.stderr.strip()}")
 
+        lines = dl_result.stdout.strip().splitlines()
+        if not lines:
+            raise HTTPException(status_code=500, detail="Download completed but no file path was reported")
+        filename_abs = lines[-1].strip()
+
         if not os.path.exists(filename_abs):
             raise HTTPException(status_code=500, detail="Download completed but file not found")
 
@@ -257,13 +401,21 @@ async def youtube_download(data: YouTubeDownload):
 
 @router.get("/download/{filename}")
 async def download_file(filename: str):
-    from fastapi.responses import FileResponse
-
     # Search in outputs first, then uploads
-    for folder in ["data/outputs", "data/uploads"]:
-        path = os.path.join(folder, filename)
-        if os.path.exists(path):
-            return FileResponse(path)
+    for folder in _DOWNLOAD_DIRS:
+        path = folder / filename
+        # One stat per candidate; the result is handed to FileResponse so it
+        # doesn't stat again
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        if stat.S_ISREG(st.st_mode):
+            return FileResponse(
+                path,
+                stat_result=st,
+                media_type=_DOWNLOAD_MEDIA_TYPES.get(path.suffix.lower()),
+            )
     raise HTTPException(status_code=404, detail="File not found")
 
 
@@ -18,6 +18,33 @@ class Settings(BaseSettings):
     CELERY_BROKER_URL: str = ""
     CELERY_RESULT_BACKEND: str = ""
 
+    # CPU partitioning when several Celery workers share one host:
+    # worker WORKER_INDEX of WORKER_COUNT is pinned to its slice of the cores
+    WORKER_INDEX: int = 0
+    WORKER_COUNT: int = 1
+
+    # Diarization: "cuda" also switches the worker to a single solo-pool process
+    DIARIZATION_DEVICE: str = "cpu"
+    PRELOAD_DIARIZER: bool = False
+    # Autocast precision for CUDA diarization: fp16, bf16 (Ampere+) or fp32 (TF32)
+    DIARIZATION_PRECISION: str = "fp16"
+
+    # Upper bound on concurrent FFmpeg extractions per process (0 = usable CPUs)
+    MAX_FFMPEG_PROCS: int = 0
+    # -threads per FFmpeg extraction (0 = usable CPUs / MAX_FFMPEG_PROCS, at least 1).
+    # Jobs that run one long extraction at a time decode faster with a lower
+    # MAX_FFMPEG_PROCS (more threads each); raising this instead lets
+    # procs x threads exceed the cores when extractions run concurrently
+    FFMPEG_THREADS: int = 0
+    # Niceness added to FFmpeg extractions so ML work keeps its cores (0 = off;
+    # any positive value means BELOW_NORMAL priority on Windows)
+    FFMPEG_NICE: int = 10
+
+    # Size cap for the extracted-audio cache; least recently used entries go first
+    AUDIO_CACHE_MAX_MB: int = 2048
+    # Same for the per-chunk gender feature vectors (~0.4 KB each)
+    GENDER_FEATURE_CACHE_MAX_MB: int = 64
+
     # Pydantic v2 Configuration
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -1,9 +1,10 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from app.api.routes import router as api_router
 from app.config import settings
 
-app = FastAPI(title="Auto Dub System")
+app = FastAPI(title="Auto Dub System", default_response_class=ORJSONResponse)
 
 # Add CORS Middleware
 app.add_middleware(
@@ -1,5 +1,6 @@
 import numpy as np
 import librosa
+import soundfile as sf
 import logging
 from typing import Union
 
@@ -15,6 +16,21 @@ class FeatureExtractor:
     def __init__(self, sample_rate: int = 16000):
         self.sample_rate = sample_rate
 
+    def _load_mono(self, path: str) -> np.ndarray:
+        """
+        Mono float32 at self.sample_rate via libsndfile; librosa.load
+        (audioread) only for formats libsndfile can't open.
+        """
+        try:
+            y, sr = sf.read(path, dtype="float32", always_2d=True)
+        except RuntimeError:
+            y, _ = librosa.load(path, sr=self.sample_rate, mono=True)
+            return y
+        y = y.mean(axis=1) if y.shape[1] > 1 else y[:, 0]
+        if sr != self.sample_rate:
+            y = librosa.resample(y, orig_sr=sr, target_sr=self.sample_rate)
+        return y
+
     def preprocess_audio(self, audio: Union[str, np.ndarray]) -> np.ndarray:
         """
         Loads and normalizes audio.
@@ -22,7 +38,7 @@ class FeatureExtractor:
         """
         try:
             if isinstance(audio, str):
-                y, sr = librosa.load(audio, sr=self.sample_rate, mono=True)
+                y = self._load_mono(audio)
             elif isinstance(audio, np.ndarray):
                 if audio.ndim > 1:
                     audio = librosa.to_mono(audio)
@@ -51,8 +67,14 @@ class FeatureExtractor:
             if len(y) < 4000:
                 return np.zeros(60) # Increased dimension to 60 for new features
 
+            # Shared STFT (librosa defaults: n_fft=2048, hop=512) reused by
+            # MFCC and spectral centroid instead of recomputing it per feature
+            mag = np.abs(librosa.stft(y, n_fft=2048, hop_length=512))
+            power = mag ** 2
+
             # 1. MFCCs (20 coefficients)
-            mfcc = librosa.feature.mfcc(y=y, sr=self.sample_rate, n_mfcc=20)
+            mel = librosa.feature.melspectrogram(S=power, sr=self.sample_rate, n_mels=128)
+            mfcc = librosa.feature.mfcc(S=librosa.power_to_db(mel), n_mfcc=20)
             
             # 2. Pitch (YIN) - Strongest gender indicator
             try:
@@ -72,12 +94,13 @@ class FeatureExtractor:
                 lpc = np.zeros(13)
 
             # 4. Spectral Centroid
-            spec = librosa.feature.spectral_centroid(y=y, sr=self.sample_rate)
+            spec = librosa.feature.spectral_centroid(S=mag, sr=self.sample_rate)
 
             # 5. Zero Crossing Rate
             zcr = librosa.feature.zero_crossing_rate(y)
 
-            # 6. RMS (Energy)
+            # 6. RMS (Energy) - time domain like ZCR; RMS from the windowed
+            # STFT would rescale the values the model was trained on
             rms = librosa.feature.rms(y=y)
 
             # --- Aggregation (Mean and Std) ---
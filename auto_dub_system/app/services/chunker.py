@@ -1,15 +1,181 @@
 import os
+import sys
+import math
+import queue
+import threading
+import csv
+import hashlib
+import logging
 import subprocess
 import shutil
 import numpy as np
 import torch
-import librosa
 import soundfile as sf
 
 from pydub import AudioSegment
 from pydub.silence import split_on_silence
 from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from types import SimpleNamespace
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+try:
+    # numba ships with librosa; without it the numpy kernels below are used.
+    # The JIT kernels are cache=True, so they compile once per install and
+    # later processes load them from __pycache__
+    from numba import njit, prange
+    _HAVE_NUMBA = True
+except ImportError:
+    _HAVE_NUMBA = False
+
+
+# =========================================================
+# RMS SILENCE MASK
+# =========================================================
+
+def _rms_mask_numpy(y, win, hop, thresh_amp):
+    # Running sum of squares: each window's energy is one subtraction,
+    # without materialising the (n_frames, win) frame matrix
+    csum = np.concatenate(([0.0], np.cumsum(y.astype(np.float64) ** 2)))
+    starts = np.arange(0, len(y) - win + 1, hop)
+    energy = np.maximum(csum[starts + win] - csum[starts], 0.0)
+    return np.sqrt(energy / win) > thresh_amp
+
+
+if _HAVE_NUMBA:
+    # The kernel streams over the samples once in constant memory and runs
+    # the windows across cores
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _rms_mask(y, win, hop, thresh_amp):
+        n = (len(y) - win) // hop + 1
+        out = np.empty(n, np.bool_)
+        for i in prange(n):
+            off = i * hop
+            acc = 0.0
+            for j in range(win):
+                v = y[off + j]
+                acc += v * v
+            out[i] = math.sqrt(acc / win) > thresh_amp
+        return out
+
+else:
+    _rms_mask = _rms_mask_numpy
+
+
+# =========================================================
+# SPEAKER ASSIGNMENT
+# =========================================================
+
+def _best_turns_numpy(ws, we, ts, te, tile=4096):
+    # (items x turns) overlap in tiles of turns to bound memory
+    n = len(ws)
+    rows = np.arange(n)
+    ws, we = ws[:, None], we[:, None]
+    best = np.zeros(n, np.int64)
+    best_ov = np.zeros(n)
+    near = np.zeros(n, np.int64)
+    near_gap = np.full(n, np.inf)
+
+    for lo in range(0, len(ts), tile):
+        s, e = ts[lo:lo + tile], te[lo:lo + tile]
+        ov = np.maximum(np.minimum(we, e) - np.maximum(ws, s), 0)
+        idx = ov.argmax(axis=1)
+        val = ov[rows, idx]
+        better = val > best_ov
+        best[better] = idx[better] + lo
+        best_ov[better] = val[better]
+
+        gap = np.minimum(np.abs(ws - e), np.abs(we - s))
+        idx = gap.argmin(axis=1)
+        val = gap[rows, idx]
+        closer = val < near_gap
+        near[closer] = idx[closer] + lo
+        near_gap[closer] = val[closer]
+
+    return np.where(best_ov > 0, best, near)
+
+
+if _HAVE_NUMBA:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _best_turns_jit(ws, we, ts, te):
+        # Same result as _best_turns_numpy, without the overlap matrix
+        out = np.empty(len(ws), np.int64)
+        for k in prange(len(ws)):
+            best, best_ov = -1, 0.0
+            near, near_gap = 0, np.inf
+            for i in range(len(ts)):
+                ov = min(we[k], te[i]) - max(ws[k], ts[i])
+                if ov > best_ov:
+                    best, best_ov = i, ov
+                gap = min(abs(ws[k] - te[i]), abs(we[k] - ts[i]))
+                if gap < near_gap:
+                    near, near_gap = i, gap
+            out[k] = best if best >= 0 else near
+        return out
+
+    def _best_turns(ws, we, ts, te):
+        # A handful of turns doesn't pay for the kernel dispatch
+        if len(ts) < 16:
+            return _best_turns_numpy(ws, we, ts, te)
+        return _best_turns_jit(ws, we, ts, te)
+
+else:
+    _best_turns = _best_turns_numpy
+
+
+# =========================================================
+# SPEAKER FEATURE WORKERS
+# =========================================================
+
+def _speaker_features(gender_model, y, f0=None):
+    try:
+        return gender_model.extract_features(gender_model.preprocess_audio(y), f0=f0)
+    except Exception:
+        # A zero row is reported as unknown by classify_batch
+        return np.zeros(60, dtype=np.float32)
+
+
+def _speaker_features_worker(y, f0):
+    # Runs in a feature pool worker, whose detector singleton is the model
+    # the pool was built with
+    from app.services.gender_detection import get_gender_detector
+    return _speaker_features(get_gender_detector(), y, f0)
+
+
+# =========================================================
+# TURNS
+# =========================================================
+
+@dataclass
+class Turns:
+    """Diarization turns as parallel arrays; speaker_ids index id2label."""
+    starts: np.ndarray
+    ends: np.ndarray
+    speaker_ids: np.ndarray
+    id2label: list
+
+    def __len__(self):
+        return len(self.starts)
+
+    @classmethod
+    def from_dicts(cls, turns):
+        ids = {}
+        speaker_ids = [ids.setdefault(t["speaker"], len(ids)) for t in turns]
+        return cls(
+            np.array([t["start"] for t in turns], np.float64),
+            np.array([t["end"] for t in turns], np.float64),
+            np.array(speaker_ids, np.int32),
+            list(ids)
+        )
+
+    def to_dicts(self):
+        return [
+            {"start": s, "end": e, "speaker": self.id2label[i]}
+            for s, e, i in zip(self.starts.tolist(), self.ends.tolist(), self.speaker_ids.tolist())
+        ]
 
 
 # =========================================================
@@ -19,6 +185,10 @@ from types import SimpleNamespace
 class ChunkingManager:
 
     FFMPEG = "ffmpeg"
+    # Decoder pipe capacity on Linux, so FFmpeg can run ahead of the reader
+    PIPE_SIZE = 1 << 20
+    # Segment concats run per FFmpeg process in chunk_to_segments
+    CONCAT_BATCH = 16
 
     # -----------------------------------------------------
     # INIT
@@ -33,12 +203,45 @@ class ChunkingManager:
                 pass
         cls.FFMPEG = shutil.which("ffmpeg") or "ffmpeg"
 
+    @classmethod
+    def _grow_pipe(cls, pipe):
+        if not sys.platform.startswith("linux"):
+            return
+        try:
+            import fcntl
+            # F_SETPIPE_SZ is only exported by fcntl from Python 3.10
+            fcntl.fcntl(pipe.fileno(), getattr(fcntl, "F_SETPIPE_SZ", 1031), cls.PIPE_SIZE)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _read_exact(stream, view):
+        """Fill `view` from a raw stream; returns bytes read (short only at EOF)."""
+        got = 0
+        size = len(view)
+        while got < size:
+            n = stream.readinto(view[got:])
+            if not n:
+                break
+            got += n
+        return got
+
 
     # =====================================================
     # UNIVERSAL AUDIO GENERATOR (STREAM + SEGMENT + ASR)
     # =====================================================
     @classmethod
-    def audio_chunks(cls, source, sr=16000, chunk_sec=5, start=None, duration=None):
+    def audio_chunks(cls, source, sr=16000, chunk_sec=5, start=None, duration=None, reuse=False):
+        """
+        Stream mono audio from `source` in chunk_sec pieces.
+
+        FFmpeg emits raw s16le PCM (no WAV header) at `sr` Hz, mono,
+        so stdout is a contiguous int16 stream; each yielded chunk is
+        float32 in [-1, 1).
+
+        With reuse=True every chunk is a view of one float32 buffer,
+        valid only until the next chunk is requested.
+        """
 
         if not os.path.exists(source):
             raise FileNotFoundError(source)
@@ -55,15 +258,81 @@ class ChunkingManager:
 
         cmd += ["-vn", "-ac", "1", "-ar", str(sr), "-f", "s16le", "pipe:1"]
 
-        p = subprocess.Popen(cmd, stdout=subprocess.PIPE)
+        # Own process group, so stopping early doesn't signal our own group
+        if os.name == "nt":
+            group_kwargs = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+        else:
+            group_kwargs = {"start_new_session": True}
 
-        size = sr * chunk_sec * 2
+        # Unbuffered pipe: readinto() fills our buffer directly, with no
+        # BufferedReader copy in between
+        p = subprocess.Popen(cmd, stdout=subprocess.PIPE, bufsize=0, **group_kwargs)
+        cls._grow_pipe(p.stdout)
 
-        while True:
-            raw = p.stdout.read(size)
-            if not raw:
-                break
-            yield np.frombuffer(raw, np.int16).astype(np.float32) / 32768
+        # Whole samples only: chunk_sec may be fractional (segment_numpy)
+        size = int(sr * chunk_sec) * 2
+        buf = bytearray(size)
+        view = memoryview(buf)
+        f32 = np.empty(size // 2, dtype=np.float32) if reuse else None
+        finished = False
+
+        try:
+            while True:
+                # Raw reads can come back short; keep filling so every chunk
+                # except the last is exactly chunk_sec long
+                got = cls._read_exact(p.stdout, view)
+                if not got:
+                    finished = True
+                    break
+                # Cast and scale in one pass. Unless reuse is set the output
+                # is a fresh array: callers such as segment_numpy keep every chunk
+                pcm = np.frombuffer(buf, np.int16, count=got // 2)
+                out = f32[:pcm.size] if reuse else np.empty(pcm.shape, dtype=np.float32)
+                np.multiply(pcm, np.float32(1.0 / 32768.0), out=out)
+                yield out
+        finally:
+            # A consumer that stops early (break / close()) shouldn't leave
+            # FFmpeg decoding the rest of the file
+            p.stdout.close()
+            if not finished and p.poll() is None:
+                p.terminate()
+            try:
+                p.wait(timeout=1)
+            except subprocess.TimeoutExpired:
+                p.kill()
+                p.wait()
+
+
+    # =====================================================
+    # DECODE ONCE (MEMORY-MAPPED CACHE)
+    # =====================================================
+    @classmethod
+    def cache_decode(cls, source, sr=16000, cache_dir="data/cache/pcm"):
+        """
+        Decode `source` once to mono float32 on disk and return it as a
+        read-only np.memmap. Later calls (and other stages/processes) map
+        the same file instead of decoding again; pass the result to
+        segment_numpy to slice clips without FFmpeg.
+        """
+        if not os.path.exists(source):
+            raise FileNotFoundError(source)
+
+        st = os.stat(source)
+        ident = f"{os.path.abspath(source)}|{st.st_size}|{st.st_mtime_ns}"
+        key = hashlib.sha1(ident.encode("utf-8")).hexdigest()
+        path = os.path.join(cache_dir, f"{key}_{sr}.f32")
+
+        if not os.path.exists(path):
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                for chunk in cls.audio_chunks(source, sr=sr, chunk_sec=30, reuse=True):
+                    chunk.tofile(f)
+            os.replace(tmp, path)
+
+        if os.path.getsize(path) == 0:
+            return np.array([], np.float32)
+        return np.memmap(path, dtype=np.float32, mode="r")
 
 
     # =====================================================
@@ -71,6 +340,28 @@ class ChunkingManager:
     # =====================================================
     @classmethod
     def segment_numpy(cls, source, start, duration=None, sr=16000):
+        # Already-decoded audio (e.g. from cache_decode): just slice it
+        if isinstance(source, np.ndarray):
+            lo = int((start or 0) * sr)
+            hi = lo + int(duration * sr) if duration else None
+            return source[lo:hi]
+
+        # Short clips are dominated by FFmpeg process startup; decode
+        # in-process when PyAV is installed
+        if not os.path.exists(source):
+            raise FileNotFoundError(source)
+        try:
+            import av
+        except ImportError:
+            av = None
+        if av is not None:
+            try:
+                return cls._decode_pyav(source, start, duration, sr)
+            except av.error.FFmpegError as e:
+                # e.g. a container/codec PyAV's bundled FFmpeg can't handle;
+                # the ffmpeg CLI may still decode it
+                logger.debug(f"PyAV decode of {source} failed ({e}), falling back to ffmpeg")
+
         chunks = list(
             cls.audio_chunks(
                 source,
@@ -80,50 +371,155 @@ class ChunkingManager:
                 duration=duration
             )
         )
+        if len(chunks) == 1:
+            # With a duration the clip arrives as one chunk, read straight
+            # into a buffer of that size; no concatenate copy needed
+            return chunks[0]
         return np.concatenate(chunks) if chunks else np.array([], np.float32)
 
 
+    @staticmethod
+    def _decode_pyav(source, start, duration=None, sr=16000):
+        """Decode [start, start+duration) to mono float32 at `sr` with PyAV."""
+        import av
+
+        first = int(round((start or 0) * sr))
+        last = first + int(duration * sr) if duration else None
+
+        parts = []
+        pos = None  # sample index (at sr) of the first decoded sample
+        total = 0
+
+        with av.open(source) as container:
+            stream = container.streams.audio[0]
+            if start:
+                # Lands on or before `start`; the excess is trimmed below
+                container.seek(int(start * av.time_base))
+            resampler = av.AudioResampler(format="flt", layout="mono", rate=sr)
+
+            for frame in container.decode(stream):
+                if pos is None:
+                    pos = int(round(float(frame.pts * frame.time_base) * sr)) if frame.pts is not None else 0
+                for out in resampler.resample(frame):
+                    data = out.to_ndarray().reshape(-1)
+                    parts.append(data)
+                    total += len(data)
+                if last is not None and pos + total >= last:
+                    break
+            else:
+                for out in resampler.resample(None):
+                    parts.append(out.to_ndarray().reshape(-1))
+
+        if not parts:
+            return np.array([], np.float32)
+        audio = np.concatenate(parts)
+        lo = max(first - (pos or 0), 0)
+        hi = None if last is None else max(last - (pos or 0), lo)
+        return audio[lo:hi]
+
     # =====================================================
     # ASR CHUNKING
     # =====================================================
     @staticmethod
-    def asr(audio, model, src_lang="auto", device="cpu"):
-
-        sr = 16000
-        dur = len(audio) / sr
-        win = 20 if dur > 60 else 10
-        step = win * sr
-
-        segs = []
-        infos = []
-
-        for i in range(0, len(audio), step):
-
-            chunk = audio[i:i + step]
-            if len(chunk) < 8000:
-                continue
+    def asr(audio, model, src_lang="auto", device="cpu", batch_size=None):
+        """
+        Transcribe 16 kHz mono float32 audio with a faster-whisper model.
 
-            offset = i / sr
+        With faster-whisper >= 1.1 the VAD speech regions are encoded in
+        batches (one forward pass per batch_size windows); otherwise the
+        audio is transcribed window by window.
+        """
 
-            out, info = model.transcribe(
-                chunk,
+        try:
+            from faster_whisper import BatchedInferencePipeline
+        except ImportError:
+            BatchedInferencePipeline = None
+
+        if BatchedInferencePipeline is not None and len(audio) >= 8000:
+            pipeline = BatchedInferencePipeline(model=model)
+            out, info = pipeline.transcribe(
+                audio,
                 vad_filter=True,
                 language=None if src_lang == "auto" else src_lang,
                 beam_size=5 if device == "cuda" else 2,
-                word_timestamps=True
+                word_timestamps=True,
+                batch_size=batch_size or (16 if device == "cuda" else 4)
             )
-
-            infos.append(info)
-
-            for s in out:
-                segs.append(SimpleNamespace(
-                    start=s.start + offset,
-                    end=s.end + offset,
+            return [
+                SimpleNamespace(
+                    start=s.start,
+                    end=s.end,
                     text=s.text,
                     words=s.words,
                     segment_language=info.language,
                     segment_language_prob=info.language_probability
-                ))
+                )
+                for s in out
+            ]
+
+        sr = 16000
+        dur = len(audio) / sr
+        win = 20 if dur > 60 else 10
+        step = win * sr
+
+        segs = []
+
+        # transcribe() runs VAD, language detection and the mel features
+        # eagerly and decodes lazily while its segments are iterated. A
+        # producer thread prepares the next window while this thread
+        # decodes the current one; the bounded queue caps read-ahead.
+        q = queue.Queue(maxsize=2)
+        stop = threading.Event()
+
+        def produce():
+            try:
+                for i in range(0, len(audio), step):
+                    if stop.is_set():
+                        return
+                    chunk = audio[i:i + step]
+                    if len(chunk) < 8000:
+                        continue
+                    out, info = model.transcribe(
+                        chunk,
+                        vad_filter=True,
+                        language=None if src_lang == "auto" else src_lang,
+                        beam_size=5 if device == "cuda" else 2,
+                        word_timestamps=True
+                    )
+                    q.put((i / sr, out, info))
+                q.put(None)
+            except BaseException as e:
+                q.put(e)
+
+        producer = threading.Thread(target=produce, daemon=True)
+        producer.start()
+
+        try:
+            while True:
+                item = q.get()
+                if item is None:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+
+                offset, out, info = item
+                for s in out:
+                    segs.append(SimpleNamespace(
+                        start=s.start + offset,
+                        end=s.end + offset,
+                        text=s.text,
+                        words=s.words,
+                        segment_language=info.language,
+                        segment_language_prob=info.language_probability
+                    ))
+        finally:
+            # On error, unblock a producer waiting on the full queue
+            stop.set()
+            while producer.is_alive():
+                try:
+                    q.get(timeout=0.1)
+                except queue.Empty:
+                    pass
 
         return segs
 
@@ -132,59 +528,258 @@ class ChunkingManager:
     # SPEAKER GROUPING
     # =====================================================
     @staticmethod
-    def speakers(audio, diarizer, gender_model, min_sec=2.5):
+    def speakers(audio, diarizer, gender_model, min_sec=2.5, silence_peak=0.005):
+        """
+        Diarize 16 kHz mono audio and guess a gender per speaker.
+        Returns (Turns, {speaker: gender}); Turns.to_dicts() gives the
+        [{"start", "end", "speaker"}] list form.
+        """
 
         wav = torch.from_numpy(audio).float().unsqueeze(0)
         diar = diarizer({"waveform": wav, "sample_rate": 16000})
 
         sr = 16000
-        turns = []
-        bank = {}
-
+        n = len(audio)
+        starts, ends, speaker_ids, ids = [], [], [], {}
         for t, _, spk in diar.itertracks(yield_label=True):
-            turns.append({"start": t.start, "end": t.end, "speaker": spk})
-            seg = audio[int(t.start * sr):int(t.end * sr)]
-            if len(seg) > 0:
-                bank.setdefault(spk, []).append(seg)
+            starts.append(t.start)
+            ends.append(t.end)
+            speaker_ids.append(ids.setdefault(spk, len(ids)))
+        turns = Turns(
+            np.array(starts, np.float64),
+            np.array(ends, np.float64),
+            np.array(speaker_ids, np.int32),
+            list(ids)
+        )
+
+        # Record sample ranges only; audio is sliced once per speaker below
+        first = (turns.starts * sr).astype(np.int64)
+        last = np.minimum((turns.ends * sr).astype(np.int64), n)
+        spans = defaultdict(list)
+        totals = Counter()  # running sample count per speaker
+        for i in np.flatnonzero(last > first).tolist():
+            s, e = int(first[i]), int(last[i])
+            # Turns that are near-silent throughout (peak sampled every
+            # 10 ms) add nothing to the gender input
+            if np.abs(audio[s:e:160]).max() >= silence_peak:
+                spk = turns.id2label[turns.speaker_ids[i]]
+                spans[spk].append((s, e))
+                totals[spk] += e - s
 
         genders = {}
+        pending = []
 
-        for spk, chunks in bank.items():
-            merged = np.concatenate(chunks)
-            if len(merged) < sr * min_sec:
+        for spk in spans:
+            # Short speakers are decided from the span lengths, without copying audio
+            if totals[spk] < sr * min_sec:
                 genders[spk] = "Unknown"
-                continue
-            r = gender_model.predict(merged)
-            genders[spk] = r.get("gender", "Unknown").capitalize()
+            else:
+                pending.append(spk)
+
+        def merged(spk):
+            # Filled in place at the known total length
+            out = np.empty(totals[spk], dtype=audio.dtype)
+            pos = 0
+            for s, e in spans[spk]:
+                out[pos:pos + e - s] = audio[s:e]
+                pos += e - s
+            return out
+
+        if pending:
+            # Speakers are independent; librosa/numpy release the GIL for most
+            # of the feature work, so threads overlap it
+            workers = min(len(pending), 4)
+            if hasattr(gender_model, "classify_batch"):
+                # One YIN pass over the recording; each speaker takes the
+                # frames centred inside its turns instead of re-running it
+                f0_frames = None
+                if hasattr(gender_model, "pitch_track"):
+                    try:
+                        f0_frames = gender_model.pitch_track(audio)
+                    except Exception:
+                        pass
+
+                def speaker_f0(spk):
+                    if f0_frames is None:
+                        return None
+                    hop = gender_model.YIN_HOP
+                    idx = [np.arange(-(-s // hop), min(-(-e // hop), len(f0_frames))) for s, e in spans[spk]]
+                    return f0_frames[np.concatenate(idx)]
+
+                # Features per speaker in parallel, then one model call.
+                # MFCC/LPC hold the GIL for part of their run, so several
+                # speakers go to the long-lived process pool (the model is
+                # shipped once per worker); threads remain the fallback, e.g.
+                # inside daemonic prefork workers that cannot start children
+                rows = None
+                if getattr(gender_model, "gpu_features", False):
+                    # CUDA: spectral features for all speakers in one batch
+                    signals, f0s = [], []
+                    for spk in pending:
+                        try:
+                            signals.append(gender_model.preprocess_audio(merged(spk)))
+                        except Exception:
+                            signals.append(np.zeros(0, dtype=np.float32))
+                        f0s.append(speaker_f0(spk))
+                    rows = list(gender_model.extract_features_batch(signals, f0s))
+                elif len(pending) > 1:
+                    from app.services.gender_detection import get_feature_pool, discard_feature_pool
+                    pool = get_feature_pool(gender_model)
+                    if pool is not None:
+                        try:
+                            rows = list(pool.map(
+                                _speaker_features_worker,
+                                [merged(spk) for spk in pending],
+                                [speaker_f0(spk) for spk in pending]
+                            ))
+                        except (BrokenProcessPool, OSError):
+                            # A dead worker breaks the pool for good; the next
+                            # call builds a fresh one
+                            discard_feature_pool()
+                            rows = None
+
+                if rows is None:
+                    with ThreadPoolExecutor(max_workers=workers) as ex:
+                        rows = list(ex.map(
+                            lambda spk: _speaker_features(gender_model, merged(spk), speaker_f0(spk)),
+                            pending
+                        ))
+                results = gender_model.classify_batch(np.stack(rows))
+            else:
+                with ThreadPoolExecutor(max_workers=workers) as ex:
+                    results = list(ex.map(lambda spk: gender_model.predict(merged(spk)), pending))
+
+            for spk, r in zip(pending, results):
+                genders[spk] = r.get("gender", "Unknown").capitalize()
 
         return turns, genders
 
+    @staticmethod
+    def assign_speakers(items, turns):
+        """
+        Label each item (ASR segment or word, anything with start/end) with
+        the speaker of the turn it overlaps most, or the nearest turn when
+        it overlaps none. `turns` is a Turns or a list of turn dicts.
+        Returns labels in item order.
+        """
+
+        if not isinstance(turns, Turns):
+            turns = Turns.from_dicts(turns)
+        if not items or not len(turns):
+            return [None] * len(items)
+
+        ws = np.array([it.start for it in items], np.float64)
+        we = np.array([it.end for it in items], np.float64)
+        best = _best_turns(ws, we, turns.starts, turns.ends)
+
+        labels = np.array(turns.id2label, dtype=object)
+        return labels[turns.speaker_ids[best]].tolist()
+
 
     # =====================================================
     # SILENCE REMOVAL
     # =====================================================
     @staticmethod
     def remove_silence(in_path, out_path, min_len=100, thresh=-45, keep=50):
+        """
+        Drop silences of at least `min_len` ms quieter than `thresh` dBFS,
+        keeping `keep` ms of padding around speech; writes 24 kHz mono WAV.
+        Returns `in_path` unchanged when the whole input is silent.
+        """
 
-        snd = AudioSegment.from_file(in_path)
-        parts = split_on_silence(snd, min_len, thresh, keep)
-        out = sum(parts, AudioSegment.empty())
-        out.set_frame_rate(24000).set_channels(1).export(out_path, format="wav")
+        try:
+            y, sr = sf.read(in_path, dtype="float32", always_2d=True)
+        except RuntimeError:
+            # Formats libsndfile can't read (e.g. MP3 on older builds)
+            snd = AudioSegment.from_file(in_path)
+            parts = split_on_silence(snd, min_len, thresh, keep)
+            if not parts:
+                # All silence: keep the input rather than write an empty WAV
+                return in_path
+            # One join instead of sum(), which re-copies the accumulated audio per part
+            out = snd._spawn(b"".join(p._data for p in parts))
+            out.set_frame_rate(24000).set_channels(1).export(out_path, format="wav")
+            return out_path
+
+        y = y.mean(axis=1) if y.shape[1] > 1 else y[:, 0]
+
+        # Windowed RMS (50% overlap) over min_len windows
+        win = max(1, sr * min_len // 1000)
+        hop = max(1, win // 2)
+        if len(y) >= win:
+            # dBFS threshold as linear amplitude (rms + 1e-9 > 10^(thresh/20))
+            voiced = _rms_mask(np.ascontiguousarray(y), win, hop, 10 ** (thresh / 20) - 1e-9)
+        else:
+            voiced = np.array([20 * np.log10(np.sqrt(np.mean(y * y)) + 1e-9) > thresh]) if len(y) else np.zeros(0, bool)
+
+        # Voiced frame runs -> padded sample intervals, merged where they touch
+        pad = sr * keep // 1000
+        edges = np.diff(np.concatenate(([0], voiced.astype(np.int8), [0])))
+        run_starts = np.flatnonzero(edges == 1)
+        run_ends = np.flatnonzero(edges == -1) - 1
+
+        intervals = []
+        for a, b in zip(run_starts, run_ends):
+            s = max(a * hop - pad, 0)
+            e = min(b * hop + win + pad, len(y))
+            if intervals and s <= intervals[-1][1]:
+                intervals[-1][1] = max(intervals[-1][1], e)
+            else:
+                intervals.append([s, e])
+
+        if not intervals:
+            # All silence: keep the input rather than write an empty WAV
+            return in_path
+
+        out = np.concatenate([y[s:e] for s, e in intervals])
+        if sr != 24000:
+            # Deferred: librosa's import (scipy, numba, soxr, audioread) is
+            # too heavy to pay in every worker that loads this module
+            import librosa
+            out = librosa.resample(out, orig_sr=sr, target_sr=24000)
+        sf.write(out_path, out, 24000, subtype="PCM_16")
         return out_path
 
 
     @staticmethod
-    def trim_edges(path):
-        y, sr = librosa.load(path)
-        y, _ = librosa.effects.trim(y, top_db=60)
+    def trim_edges(path, top_db=60):
+        # Native rate, no resample; trim to the first/last sample within
+        # top_db of the peak in a single pass
+        y, sr = sf.read(path, dtype="float32", always_2d=True)
+        y = y.mean(axis=1) if y.shape[1] > 1 else y[:, 0]
         new = path.replace(".wav", "_trim.wav")
-        sf.write(new, y, sr)
+
+        abs_y = np.abs(y)
+        if not len(abs_y):
+            return path
+        loud = np.flatnonzero(abs_y > abs_y.max() * 10 ** (-top_db / 20))
+        if not len(loud):
+            return path
+
+        sf.write(new, y[loud[0]:loud[-1] + 1], sr, subtype="PCM_16")
         return new
 
 
     # =====================================================
     # LAYER 3: CHUNK → SEGMENTS
     # =====================================================
+    @classmethod
+    def _concat_many(cls, jobs):
+        """Concat each (list_file, out_path) pair in a single FFmpeg run."""
+        command = [cls.FFMPEG, "-hide_banner", "-loglevel", "error"]
+        for list_file, _ in jobs:
+            command += ["-f", "concat", "-safe", "0", "-i", list_file]
+        for i, (_, out_path) in enumerate(jobs):
+            command += [
+                "-map", f"{i}:a",
+                "-acodec", "pcm_s16le",
+                "-ar", "22050",
+                "-ac", "1",
+                "-y",
+                out_path
+            ]
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
     @classmethod
     def chunk_to_segments(cls, chunks_data, output_folder="segments"):
         """
@@ -203,80 +798,73 @@ class ChunkingManager:
             segment_groups[sid].append(chunk)
 
         segment_outputs = []
+        # Silence for failed TTS chunks is written from Python once per
+        # distinct length (22.05 kHz mono s16, matching the TTS output)
+        silence_files = {}
+        jobs = []
 
-        # Merge per segment
-        for sid, chunks in segment_groups.items():
-
-            chunks = sorted(
-                chunks,
-                key=lambda x: x["start_time"]
-            )
-
-            speaker_no = chunks[0]["speaker_no"]
-
-            segment_path = os.path.join(
-                output_folder,
-                f"segment_{sid}.wav"
-            )
-
-            temp_file = os.path.join(output_folder, f"chunk_list_{sid}.txt")
-
-            with open(temp_file, "w") as f:
-                for chunk in chunks:
-                    path = chunk.get('audio_path')
-                    if not path or not os.path.exists(path):
-                        # Create a silence file if TTS failed
-                        silence_dur = max(chunk["end_time"] - chunk["start_time"], 0.1)
-                        silence_path = os.path.abspath(os.path.join(output_folder, f"silence_{sid}_{chunks.index(chunk)}.wav"))
-                        
-                        # Generate silence using FFmpeg
-                        command_silence = [
-                            cls.FFMPEG,
-                            "-f", "lavfi",
-                            "-i", f"anullsrc=r=22050:cl=mono",
-                            "-t", str(silence_dur),
-                            "-y",
-                            silence_path
-                        ]
-                        subprocess.run(command_silence, check=True, capture_output=True)
-                        path = silence_path
-                    
-                    f.write(f"file '{os.path.abspath(path)}'\n")
-
-            command = [
-                cls.FFMPEG,
-                "-f", "concat",
-                "-safe", "0",
-                "-i", temp_file,
-                "-acodec", "pcm_s16le",
-                "-ar", "22050",
-                "-ac", "1",
-                "-y",
-                segment_path
-            ]
+        try:
+            for sid, chunks in segment_groups.items():
+
+                chunks = sorted(
+                    chunks,
+                    key=lambda x: x["start_time"]
+                )
+
+                speaker_no = chunks[0]["speaker_no"]
+
+                segment_path = os.path.join(
+                    output_folder,
+                    f"segment_{sid}.wav"
+                )
+
+                list_file = os.path.join(output_folder, f"chunk_list_{sid}.txt")
+
+                with open(list_file, "w") as f:
+                    for chunk in chunks:
+                        path = chunk.get('audio_path')
+                        if not path or not os.path.exists(path):
+                            # Create a silence file if TTS failed
+                            n_samples = int(max(chunk["end_time"] - chunk["start_time"], 0.1) * 22050)
+                            path = silence_files.get(n_samples)
+                            if path is None:
+                                path = os.path.abspath(os.path.join(output_folder, f"silence_{n_samples}.wav"))
+                                sf.write(path, np.zeros(n_samples, np.int16), 22050, subtype="PCM_16")
+                                silence_files[n_samples] = path
+
+                        f.write(f"file '{os.path.abspath(path)}'\n")
+
+                jobs.append((list_file, segment_path))
+
+                segment_outputs.append({
+                    "segment_path": segment_path,
+                    "start_time": chunks[0]["start_time"],
+                    "end_time": chunks[-1]["end_time"],
+                    "speaker_no": speaker_no,
+                    "overlap": chunks[0].get("overlap", False),
+                    "segment_id": sid
+                })
+
+            # One FFmpeg per batch of segments: each concat list is an input,
+            # each segment file an output
+            for b in range(0, len(jobs), cls.CONCAT_BATCH):
+                batch = jobs[b:b + cls.CONCAT_BATCH]
+                try:
+                    cls._concat_many(batch)
+                except subprocess.CalledProcessError:
+                    if len(batch) == 1:
+                        raise
+                    for job in batch:
+                        cls._concat_many([job])
 
-            subprocess.run(command, check=True)
-            
-            # Clean up silence files created for this segment
-            # (In a production system you might want to cache these, but for now we clean up)
-            with open(temp_file, "r") as f:
-                for line in f:
-                    if "silence_" in line:
-                        sil_path = line.strip().split("'")[1]
-                        if os.path.exists(sil_path):
-                            try: os.remove(sil_path)
-                            except: pass
-
-            os.remove(temp_file)
-
-            segment_outputs.append({
-                "segment_path": segment_path,
-                "start_time": chunks[0]["start_time"],
-                "end_time": chunks[-1]["end_time"],
-                "speaker_no": speaker_no,
-                "overlap": chunks[0].get("overlap", False),
-                "segment_id": sid
-            })
+        finally:
+            for list_file, _ in jobs:
+                if os.path.exists(list_file):
+                    os.remove(list_file)
+            for sil_path in silence_files.values():
+                if os.path.exists(sil_path):
+                    try: os.remove(sil_path)
+                    except: pass
 
         return segment_outputs
 
@@ -319,7 +907,7 @@ class ChunkingManager:
                             "-t", str(round(gap_dur, 3)),
                             "-y", silence_path
                         ]
-                        subprocess.run(cmd_silence, check=True, capture_output=True)
+                        subprocess.run(cmd_silence, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
                         f.write(f"file '{silence_path}'\n")
                         silence_files.append(silence_path)
                     
@@ -343,7 +931,7 @@ class ChunkingManager:
                 "-y",
                 output_path
             ]
-            subprocess.run(command, check=True, capture_output=True)
+            subprocess.run(command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
 
         finally:
             # Cleanup
@@ -384,13 +972,68 @@ class ChunkingManager:
             output_path
         ]
 
-        subprocess.run(command, check=True, capture_output=True)
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
         return output_path
 
 
     # =====================================================
     # LAYER 1: CHUNK SEPARATION
     # =====================================================
+    @classmethod
+    def _ffmpeg_chunk_files(cls, segment_path, output_dir, base_name, sr, chunk_sec):
+        """
+        Decode and cut a segment into chunk_sec WAV files in one FFmpeg pass
+        (segment muxer), so the audio never passes through Python.
+        Returns [(chunk_path, offset, duration), ...] from the muxer's CSV list.
+        """
+        pattern = os.path.join(output_dir, base_name.replace("%", "%%") + "_chunk_%04d.wav")
+        list_path = os.path.join(output_dir, f"{base_name}_chunks.csv")
+
+        cmd = [
+            cls.FFMPEG, "-hide_banner", "-loglevel", "error",
+            "-i", segment_path,
+            "-vn", "-ac", "1", "-ar", str(sr), "-c:a", "pcm_s16le",
+            "-f", "segment",
+            "-segment_time", str(chunk_sec),
+            "-reset_timestamps", "1",
+            "-segment_list", list_path,
+            "-segment_list_type", "csv",
+            "-y", pattern
+        ]
+
+        try:
+            subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+            with open(list_path, newline="") as f:
+                rows = list(csv.reader(f))
+        finally:
+            if os.path.exists(list_path):
+                os.remove(list_path)
+
+        return [
+            (os.path.join(output_dir, name), float(seg_start), float(seg_end) - float(seg_start))
+            for name, seg_start, seg_end in rows
+        ]
+
+    @staticmethod
+    def _soundfile_chunk_files(segment_path, output_dir, base_name, sr, chunk_sec):
+        """
+        Splice chunk_sec blocks straight out of a WAV that is already mono at
+        `sr` (what SegmentSeparator writes): no FFmpeg, no resample.
+        Returns [(chunk_path, offset, duration), ...], or None if the file
+        needs converting first.
+        """
+        with sf.SoundFile(segment_path) as f:
+            if f.samplerate != sr or f.channels != 1:
+                return None
+            pieces = []
+            offset = 0
+            for i, block in enumerate(f.blocks(blocksize=int(sr * chunk_sec), dtype="int16")):
+                chunk_path = os.path.join(output_dir, f"{base_name}_chunk_{i:04d}.wav")
+                sf.write(chunk_path, block, sr, subtype="PCM_16")
+                pieces.append((chunk_path, offset / sr, len(block) / sr))
+                offset += len(block)
+        return pieces
+
     @classmethod
     def chunk_separation(cls, segment_path, start, end, speaker_no, overlap, segment_id=None, chunk_sec=5):
         """
@@ -411,11 +1054,36 @@ class ChunkingManager:
         
         # audio_chunks yields numpy arrays
         sr = 16000
-        gen = cls.audio_chunks(segment_path, sr=sr, chunk_sec=chunk_sec)
         
         base_name = os.path.splitext(os.path.basename(segment_path))[0]
         output_dir = os.path.dirname(segment_path)
         
+        # Preferred path: the segment is already 16 kHz mono WAV, so slice it
+        # with soundfile; otherwise FFmpeg converts and writes the chunks
+        try:
+            pieces = cls._soundfile_chunk_files(segment_path, output_dir, base_name, sr, chunk_sec)
+        except RuntimeError:
+            pieces = None
+        if pieces is None:
+            try:
+                pieces = cls._ffmpeg_chunk_files(segment_path, output_dir, base_name, sr, chunk_sec)
+            except (subprocess.CalledProcessError, OSError, ValueError):
+                pieces = None
+        
+        if pieces:
+            for chunk_path, offset, chunk_dur in pieces:
+                chunks_metadata.append({
+                    "chunk_path": chunk_path,
+                    "start_time": round(start + offset, 3),
+                    "end_time": round(start + offset + chunk_dur, 3),
+                    "speaker_no": speaker_no,
+                    "overlap": overlap,
+                    "segment_id": segment_id
+                })
+            return chunks_metadata
+        
+        # Fallback: decode through audio_chunks and write each chunk from Python
+        gen = cls.audio_chunks(segment_path, sr=sr, chunk_sec=chunk_sec, reuse=True)
         current_time = start
         
         for i, audio_data in enumerate(gen):
@@ -4,12 +4,18 @@ Input: full_audio_path
 Output: timestamps + speaker_labels + speaker_count + overlap
 """
 
+import contextlib
+import functools
+import hashlib
+import heapq
+import importlib.util
 import logging
+import threading
 import warnings
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
-from dataclasses import dataclass, asdict
-import json
+from typing import Dict, List, NamedTuple, Tuple, Optional
+from dataclasses import dataclass
+import orjson
 
 # Suppress noisy warnings from specialized libraries
 warnings.filterwarnings("ignore", category=UserWarning, module="pyannote.audio.core.io")
@@ -20,30 +26,61 @@ warnings.filterwarnings("ignore", message=".*degrees of freedom.*")
 
 logger = logging.getLogger(__name__)
 
-# Global instance for singleton pattern
-_diarizer_instance = None
+# Loaded pipelines, one per (model, token hash, device, batch sizes, precision)
+# per worker process
+_diarizer_instances: Dict[tuple, "SpeakerDiarizer"] = {}
+_diarizer_lock = threading.Lock()
 
 def get_diarizer(model: str = "pyannote/speaker-diarization-3.1", 
-                 token: Optional[str] = None, device: str = "cpu"):
-    """Get or create a global SpeakerDiarizer instance (singleton per worker process)."""
-    global _diarizer_instance
-    if _diarizer_instance is None:
-        _diarizer_instance = SpeakerDiarizer(model, token, device)
-    return _diarizer_instance
+                 token: Optional[str] = None, device: str = "cpu",
+                 embedding_batch_size: Optional[int] = None,
+                 segmentation_batch_size: Optional[int] = None,
+                 precision: str = "fp16"):
+    """
+    Get or create the SpeakerDiarizer for these arguments (cached per worker
+    process). Every argument is part of the key, so a caller asking for other
+    batch sizes or precision than a preloaded diarizer gets its own instance.
+    The token is keyed by its hash, never stored raw.
+    """
+    key = (model, hashlib.sha256((token or "").encode()).hexdigest(), device,
+           embedding_batch_size, segmentation_batch_size, precision)
+    diarizer = _diarizer_instances.get(key)
+    if diarizer is None:
+        with _diarizer_lock:
+            # Re-check: another thread may have loaded it while we waited
+            diarizer = _diarizer_instances.get(key)
+            if diarizer is None:
+                diarizer = SpeakerDiarizer(model, token, device,
+                                           embedding_batch_size, segmentation_batch_size,
+                                           precision)
+                _diarizer_instances[key] = diarizer
+    return diarizer
+
+@functools.lru_cache(maxsize=1)
+def _pretrained_takes_token() -> bool:
+    """Whether Pipeline.from_pretrained takes token= (pyannote >= 3.x)."""
+    import inspect
+    from pyannote.audio import Pipeline
+    return "token" in inspect.signature(Pipeline.from_pretrained).parameters
 
 # ============================================================================
 # Data Structures
 # ============================================================================
 
-@dataclass
-class SpeakerSegment:
+class SpeakerSegment(NamedTuple):
+    # Tuple-backed: no per-instance __dict__ on long recordings with many turns
     start_time: float
     end_time: float
     speaker_label: str
     overlap: bool = False
     
     def to_dict(self) -> dict:
-        return asdict(self)
+        return {
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "speaker_label": self.speaker_label,
+            "overlap": self.overlap
+        }
 
 
 @dataclass
@@ -64,7 +101,7 @@ class DiarizationResult:
         }
     
     def save_json(self, path: str):
-        Path(path).write_text(json.dumps(self.to_dict(), indent=2))
+        Path(path).write_bytes(orjson.dumps(self.to_dict(), option=orjson.OPT_INDENT_2))
 
 
 class SpeakerDiarizationError(Exception):
@@ -76,8 +113,20 @@ class SpeakerDiarizationError(Exception):
 # ============================================================================
 
 class SpeakerDiarizer:
+    # Native rate of the pyannote segmentation/embedding models
+    SAMPLE_RATE = 16000
+    # Autocast dtype for the CUDA forwards; "fp32" disables autocast
+    # (bf16 needs Ampere or newer, e.g. not on a T4)
+    PRECISIONS = {"fp16": "float16", "bf16": "bfloat16", "fp32": None}
+
     def __init__(self, model: str = "pyannote/speaker-diarization-3.1", 
-                 token: Optional[str] = None, device: str = "cpu"):
+                 token: Optional[str] = None, device: str = "cpu",
+                 embedding_batch_size: Optional[int] = None,
+                 segmentation_batch_size: Optional[int] = None,
+                 precision: str = "fp16"):
+        if precision not in self.PRECISIONS:
+            raise SpeakerDiarizationError(f"Unknown precision: {precision} (use {', '.join(self.PRECISIONS)})")
+        self.precision = precision
         try:
             import torchaudio
             import numpy as np
@@ -109,11 +158,9 @@ class SpeakerDiarizer:
 
             from pyannote.audio import Pipeline
             import torch
-            import inspect
 
             # pyannote >= 3.x renamed use_auth_token → token in Pipeline.from_pretrained
-            pretrained_sig = inspect.signature(Pipeline.from_pretrained)
-            if "token" in pretrained_sig.parameters:
+            if _pretrained_takes_token():
                 self.pipeline = Pipeline.from_pretrained(model, token=token)
             else:
                 # Older pyannote still uses use_auth_token
@@ -121,61 +168,180 @@ class SpeakerDiarizer:
 
             dev = torch.device("cuda" if device == "cuda" and torch.cuda.is_available() else "cpu")
             self.pipeline = self.pipeline.to(dev)
-            logger.info(f"Pipeline ready on {dev}")
+            self.device = dev
+            self._set_batch_sizes(embedding_batch_size, segmentation_batch_size)
+            logger.info(f"Pipeline ready on {dev} ({precision if dev.type == 'cuda' else 'fp32'})")
         except ImportError:
             raise SpeakerDiarizationError("Install: pip install pyannote.audio torch torchaudio")
         except Exception as e:
             raise SpeakerDiarizationError(f"Init failed: {e}")
     
-    def _find_overlaps(self, diarization) -> List[Tuple[float, float]]:
-        overlaps = set()
+    @staticmethod
+    @contextlib.contextmanager
+    def _tf32():
+        """
+        Allow TF32 matmuls/convolutions for the diarizer's forward only.
+        The flags are process-wide, so the previous values are restored
+        afterwards for the other models loaded in this worker.
+        """
+        import torch
+
+        matmul, cudnn = torch.backends.cuda.matmul.allow_tf32, torch.backends.cudnn.allow_tf32
+        torch.backends.cuda.matmul.allow_tf32 = True
+        torch.backends.cudnn.allow_tf32 = True
+        try:
+            yield
+        finally:
+            torch.backends.cuda.matmul.allow_tf32 = matmul
+            torch.backends.cudnn.allow_tf32 = cudnn
+
+    def _set_batch_sizes(self, embedding_batch_size: Optional[int],
+                         segmentation_batch_size: Optional[int]):
+        """
+        Apply explicit batch sizes, or on CUDA pick them from free VRAM:
+        pyannote's default of 32 can OOM or thrash on smaller cards.
+        """
+        import torch
+
+        if self.device.type == "cuda" and not (embedding_batch_size and segmentation_batch_size):
+            free_bytes, _ = torch.cuda.mem_get_info(self.device)
+            auto = 8 if free_bytes < (10 << 30) else 16
+            embedding_batch_size = embedding_batch_size or auto
+            segmentation_batch_size = segmentation_batch_size or auto
+
+        if embedding_batch_size and hasattr(self.pipeline, "embedding_batch_size"):
+            self.pipeline.embedding_batch_size = embedding_batch_size
+        if segmentation_batch_size and hasattr(self.pipeline, "segmentation_batch_size"):
+            self.pipeline.segmentation_batch_size = segmentation_batch_size
+
+    def _sweep_segments(self, diarization) -> List[SpeakerSegment]:
+        """
+        Build segments in one sweep over the tracks in start order, with a
+        min-heap of active end times: a track is flagged as overlapping when
+        another is still active at its start (both get the flag).
+        """
         tracks = list(diarization.itertracks(yield_label=True))
-        for i, (s1, _, _) in enumerate(tracks):
-            for s2, _, _ in tracks[i+1:]:
-                # Manual overlap check: [s1.start, s1.end] and [s2.start, s2.end]
-                start = max(s1.start, s2.start)
-                end = min(s1.end, s2.end)
-                if end > start:
-                    overlaps.add((start, end))
-        return sorted(overlaps)
-    
-    def _build_segments(self, diarization, overlaps) -> List[SpeakerSegment]:
-        segments = []
-        for seg, _, label in diarization.itertracks(yield_label=True):
-            # Manual check if this segment intersects with any detected overlap range
-            has_overlap = False
-            for os, oe in overlaps:
-                if max(seg.start, os) < min(seg.end, oe):
-                    has_overlap = True
-                    break
-            segments.append(SpeakerSegment(seg.start, seg.end, label, has_overlap))
-        return segments
+        flags = bytearray(len(tracks))
+        active = []  # (end, track index)
+
+        for i in sorted(range(len(tracks)), key=lambda i: tracks[i][0].start):
+            seg = tracks[i][0]
+            while active and active[0][0] <= seg.start:
+                heapq.heappop(active)
+            if active:
+                flags[i] = 1
+                for _, j in active:
+                    flags[j] = 1
+            heapq.heappush(active, (seg.end, i))
+
+        return [SpeakerSegment(seg.start, seg.end, label, bool(flag))
+                for (seg, _, label), flag in zip(tracks, flags)]
     
-    def process(self, audio_path: str) -> DiarizationResult:
+    def _load(self, audio_path):
         """
-        Run diarization on the given audio path.
+        Read audio to a CPU tensor: (waveform, sample_rate, is_int16).
         Bypasses TorchCodec by loading waveform manually with torchaudio.
         """
+        import numpy as np
+        import torch
+        import torchaudio
+
+        if isinstance(audio_path, np.ndarray):
+            logger.info(f"Processing (in-memory): {len(audio_path) / self.SAMPLE_RATE:.1f}s of audio")
+            if audio_path.dtype == np.int16:
+                return torch.from_numpy(np.ascontiguousarray(audio_path)).unsqueeze(0), self.SAMPLE_RATE, True
+            waveform = torch.from_numpy(np.ascontiguousarray(audio_path, dtype=np.float32)).unsqueeze(0)
+            return waveform, self.SAMPLE_RATE, False
+
         path = Path(audio_path)
         if not path.is_file():
             raise SpeakerDiarizationError(f"File not found: {audio_path}")
-        
         logger.info(f"Processing (manual load): {path.name}")
+        waveform, sample_rate = torchaudio.load(str(path))
+        return waveform, sample_rate, False
+
+    def process(self, audio_path) -> DiarizationResult:
+        """
+        Run diarization on the given audio path.
+        Bypasses TorchCodec by loading waveform manually with torchaudio.
         
+        Also accepts an already decoded mono float32 or int16 ndarray at
+        16 kHz (e.g. from audio_separator_to_numpy), skipping the file read.
+        int16 input is scaled to float32 on the pipeline device, so only
+        half the bytes cross to the GPU.
+        """
+        try:
+            loaded = self._load(audio_path)
+        except SpeakerDiarizationError:
+            raise
+        except Exception as e:
+            logger.error(f"Diarization process failed: {e}")
+            raise SpeakerDiarizationError(f"Process failed: {e}")
+        return self._run(*loaded)
+
+    def process_many(self, audio_paths, prefetch: int = 2) -> List[DiarizationResult]:
+        """
+        Diarize several inputs in order, decoding up to `prefetch` files ahead
+        on background threads so the pipeline never waits on file reads.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        audio_paths = list(audio_paths)
+        results = []
+        with ThreadPoolExecutor(max_workers=max(1, prefetch)) as ex:
+            pending = [ex.submit(self._load, p) for p in audio_paths[:prefetch]]
+            for i in range(len(audio_paths)):
+                if i + prefetch < len(audio_paths):
+                    pending.append(ex.submit(self._load, audio_paths[i + prefetch]))
+                try:
+                    loaded = pending[i].result()
+                except SpeakerDiarizationError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Diarization process failed: {e}")
+                    raise SpeakerDiarizationError(f"Process failed: {e}")
+                results.append(self._run(*loaded))
+                pending[i] = None  # drop the decoded waveform
+        return results
+
+    def _run(self, waveform, sample_rate, pcm16) -> DiarizationResult:
         try:
             import torchaudio
             import torch
             
-            # 1. Load waveform manually (Bypasses TorchCodec/AudioDecoder)
-            waveform, sample_rate = torchaudio.load(str(path))
-            
+            # Move to the pipeline device first so downmix/resample run there
+            # (pyannote's own CPU resample otherwise starves the GPU).
+            # Pinned host memory lets the H2D copy run asynchronously.
+            if self.device.type == "cuda":
+                waveform = waveform.pin_memory().to(self.device, non_blocking=True)
+            else:
+                waveform = waveform.to(self.device)
+            if pcm16:
+                waveform = waveform.to(torch.float32).mul_(1.0 / 32768.0)
+
             # Ensure it's in the correct format for pyannote (channels, time)
             if waveform.shape[0] > 1:
                 waveform = torch.mean(waveform, dim=0, keepdim=True)
+
+            if sample_rate != self.SAMPLE_RATE:
+                waveform = torchaudio.functional.resample(waveform, sample_rate, self.SAMPLE_RATE)
+                sample_rate = self.SAMPLE_RATE
             
             # 2. Pass dict to pipeline
             logger.info("Diarization: Running pipeline... (this may take a while on CPU)")
-            diarization = self.pipeline({"waveform": waveform, "sample_rate": sample_rate})
+            # On CUDA the segmentation/embedding forwards run in fp16/bf16
+            # (tensor cores); autocast keeps reductions in fp32, and clustering
+            # runs on the returned numpy embeddings at full precision
+            amp_dtype = self.PRECISIONS[self.precision]
+            if self.device.type != "cuda":
+                amp = contextlib.nullcontext()
+            elif amp_dtype is not None:
+                amp = torch.autocast(device_type="cuda", dtype=getattr(torch, amp_dtype))
+            else:
+                # Full precision still gets tensor cores through TF32 matmuls
+                amp = self._tf32()
+            with torch.inference_mode(), amp:
+                diarization = self.pipeline({"waveform": waveform, "sample_rate": sample_rate})
             logger.info("Diarization: Pipeline finished.")
             
             # Handle newer pyannote-audio versions returning a DiarizeOutput object
@@ -183,8 +349,7 @@ class SpeakerDiarizer:
                 diarization = diarization.speaker_diarization
             
             # 3. Process results
-            overlaps = self._find_overlaps(diarization)
-            segments = self._build_segments(diarization, overlaps)
+            segments = self._sweep_segments(diarization)
             
             timestamps = [(s.start_time, s.end_time) for s in segments]
             labels = [s.speaker_label for s in segments]
@@ -193,7 +358,7 @@ class SpeakerDiarizer:
                 timestamps=timestamps,
                 speaker_labels=labels,
                 speaker_count=len(set(labels)),
-                overlap=len(overlaps) > 0,
+                overlap=any(s.overlap for s in segments),
                 segments=segments
             )
             
@@ -214,13 +379,14 @@ def speaker_diarization(full_audio_path: str,
                        use_auth_token: Optional[str] = None,
                        device: str = "cpu",
                        save_json: bool = False,
-                       output_json_path: Optional[str] = None) -> Dict:
+                       output_json_path: Optional[str] = None,
+                       precision: str = "fp16") -> Dict:
     """
     Perform speaker diarization with overlap detection.
     
     Returns: {timestamps, speaker_labels, speaker_count, overlap, segments}
     """
-    diarizer = get_diarizer(model_name, use_auth_token, device)
+    diarizer = get_diarizer(model_name, use_auth_token, device, precision=precision)
     result = diarizer.process(full_audio_path)
     
     if save_json:
@@ -230,13 +396,38 @@ def speaker_diarization(full_audio_path: str,
     return result.to_dict()
 
 
+def speaker_diarization_batch(audio_paths: List[str],
+                              model_name: str = "pyannote/speaker-diarization-3.1",
+                              use_auth_token: Optional[str] = None,
+                              device: str = "cpu",
+                              save_json: bool = False,
+                              precision: str = "fp16",
+                              prefetch: int = 2) -> List[Dict]:
+    """
+    Diarize several files with one cached pipeline, decoding the next
+    files while the current one runs.
+    
+    Returns: one speaker_diarization() dict per path, in order
+    """
+    diarizer = get_diarizer(model_name, use_auth_token, device, precision=precision)
+    results = diarizer.process_many(audio_paths, prefetch=prefetch)
+    
+    if save_json:
+        for path, result in zip(audio_paths, results):
+            result.save_json(f"{Path(path).stem}_diarization.json")
+    
+    return [result.to_dict() for result in results]
+
+
+@functools.lru_cache(maxsize=1)
 def check_dependencies() -> Dict[str, bool]:
+    # find_spec locates the packages without importing torch & co.
     deps = {}
     for pkg in ['pyannote.audio', 'torch', 'torchaudio']:
         try:
-            __import__(pkg.replace('.', '_') if '.' in pkg else pkg)
-            deps[pkg] = True
+            deps[pkg] = importlib.util.find_spec(pkg) is not None
         except ImportError:
+            # Parent package (pyannote) missing
             deps[pkg] = False
     return deps
 
@@ -5,10 +5,15 @@ Uses LightGBM model with 60-dimensional acoustic features.
 """
 
 import os
+import hashlib
 import pickle
 import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import librosa
+import soundfile as sf
 import pandas as pd
 from typing import Dict, List, Any, Optional, Union
 
@@ -16,15 +21,81 @@ logger = logging.getLogger(__name__)
 
 # Global instance for singleton pattern
 _detector_instance = None
+_detector_lock = threading.Lock()
+
+# 60-dim feature vectors keyed by the preprocessed signal, shared across jobs
+# (re-dubs of a video re-chunk identical audio). Bump the version whenever
+# extract_features changes what it computes.
+FEATURE_CACHE_DIR = "data/cache/gender_features"
+FEATURE_CACHE_VERSION = 1
+# Size-capped like the audio cache; the directory is scanned for eviction
+# once per this many stores rather than on every write
+FEATURE_CACHE_EVICT_EVERY = 256
+_feature_cache_stores = 0
+_feature_cache_lock = threading.Lock()
 
 def get_gender_detector():
     """Get or create a global GenderDetector instance (singleton per worker process)."""
     global _detector_instance
     if _detector_instance is None:
-        _detector_instance = GenderDetector()
+        with _detector_lock:
+            # Re-check: another thread may have loaded it while we waited
+            if _detector_instance is None:
+                _detector_instance = GenderDetector()
     return _detector_instance
 
 
+# Long-lived feature extraction pool (see get_feature_pool)
+_feature_pool = None
+_feature_pool_detector = None
+_feature_pool_lock = threading.Lock()
+
+
+def _init_feature_worker(detector):
+    # Pool initializer: the detector is pickled once per worker and becomes
+    # that worker's get_gender_detector() instance
+    global _detector_instance
+    _detector_instance = detector
+
+
+def get_feature_pool(detector=None) -> Optional[ProcessPoolExecutor]:
+    """
+    Process pool for CPU feature extraction, created once per process and
+    rebuilt only for a different detector (default: the singleton). Workers
+    are spawned, not forked, since this process already has torch/librosa
+    (and possibly CUDA) initialised, and sized to the CPUs this worker is
+    pinned to.
+    
+    Returns None inside daemonic processes (Celery prefork children), which
+    can't start their own; callers then extract in-process.
+    """
+    global _feature_pool, _feature_pool_detector
+    if multiprocessing.current_process().daemon:
+        return None
+    detector = detector if detector is not None else get_gender_detector()
+    with _feature_pool_lock:
+        if _feature_pool is None or _feature_pool_detector is not detector:
+            if _feature_pool is not None:
+                _feature_pool.shutdown(wait=False)
+            _feature_pool = ProcessPoolExecutor(
+                max_workers=_available_cores(),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_feature_worker,
+                initargs=(detector,)
+            )
+            _feature_pool_detector = detector
+        return _feature_pool
+
+
+def discard_feature_pool():
+    """Drop a broken pool (e.g. a worker died); the next call builds a fresh one."""
+    global _feature_pool, _feature_pool_detector
+    with _feature_pool_lock:
+        if _feature_pool is not None:
+            _feature_pool.shutdown(wait=False)
+        _feature_pool = _feature_pool_detector = None
+
+
 class GenderDetector:
     """
     Production-ready gender detection using LightGBM and acoustic features.
@@ -42,7 +113,10 @@ class GenderDetector:
         """
         self.model = None
         self.label_encoder = None
+        self.booster_ = None
+        self.classes_ = None
         self.sample_rate = sample_rate
+        self._feature_bank = None
         
         # Default model paths
         default_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "models", "gender"))
@@ -62,10 +136,31 @@ class GenderDetector:
                 self.model = pickle.load(f)
             with open(self.encoder_path, 'rb') as f:
                 self.label_encoder = pickle.load(f)
+            # Predict on the raw Booster: LGBMClassifier.predict_proba
+            # revalidates its input on every call
+            self.booster_ = getattr(self.model, 'booster_', None)
+            self.classes_ = np.asarray(self.label_encoder.classes_)
             logger.info("✅ Gender detection model loaded successfully")
         except Exception as e:
             logger.error(f"Failed to load model: {e}")
 
+    def _load_mono(self, path: str) -> np.ndarray:
+        """
+        Read a file as mono float32 at self.sample_rate.
+        
+        Chunk WAVs are already 16 kHz mono, so libsndfile reads the PCM
+        directly; librosa.load is kept for formats libsndfile can't open.
+        """
+        try:
+            y, sr = sf.read(path, dtype="float32", always_2d=True)
+        except RuntimeError:
+            y, _ = librosa.load(path, sr=self.sample_rate, mono=True)
+            return y
+        y = y.mean(axis=1) if y.shape[1] > 1 else y[:, 0]
+        if sr != self.sample_rate:
+            y = librosa.resample(y, orig_sr=sr, target_sr=self.sample_rate)
+        return y
+
     def preprocess_audio(self, audio: Union[str, np.ndarray]) -> np.ndarray:
         """
         Load and normalize audio data.
@@ -79,7 +174,7 @@ class GenderDetector:
         try:
             # Load audio
             if isinstance(audio, str):
-                y, sr = librosa.load(audio, sr=self.sample_rate, mono=True)
+                y = self._load_mono(audio)
             elif isinstance(audio, np.ndarray):
                 if audio.ndim > 1:
                     audio = librosa.to_mono(audio)
@@ -98,7 +193,38 @@ class GenderDetector:
             logger.error(f"Error preprocessing audio: {e}")
             raise
 
-    def extract_features(self, y: np.ndarray) -> np.ndarray:
+    # librosa.yin framing used for the pitch features (its defaults)
+    YIN_FRAME = 2048
+    YIN_HOP = 512
+
+    def pitch_track(self, y: np.ndarray, block_frames: int = 1024) -> np.ndarray:
+        """
+        YIN F0 per frame over a whole recording, frame t centred on sample
+        t * YIN_HOP, identical to librosa.yin(y, fmin=50, fmax=300).
+        
+        Computed in blocks of frames so a long file doesn't materialise
+        one (frame_length, n_frames) matrix; frames are independent, so
+        block edges don't change the values.
+        
+        Args:
+            y: Audio signal array
+            block_frames: Frames per librosa.yin call
+            
+        Returns:
+            F0 per frame (NaN where unvoiced)
+        """
+        half = self.YIN_FRAME // 2
+        y_pad = np.pad(y, half)
+        n_frames = 1 + (len(y_pad) - self.YIN_FRAME) // self.YIN_HOP
+        f0 = np.empty(n_frames, dtype=np.float64)
+        for b0 in range(0, n_frames, block_frames):
+            nb = min(block_frames, n_frames - b0)
+            lo = b0 * self.YIN_HOP
+            hi = lo + (nb - 1) * self.YIN_HOP + self.YIN_FRAME
+            f0[b0:b0 + nb] = librosa.yin(y_pad[lo:hi], fmin=50, fmax=300, center=False)[:nb]
+        return f0
+
+    def extract_features(self, y: np.ndarray, f0: Optional[np.ndarray] = None) -> np.ndarray:
         """
         Extract 60-dimensional acoustic features from audio.
         
@@ -112,6 +238,8 @@ class GenderDetector:
         
         Args:
             y: Audio signal array
+            f0: Optional precomputed YIN frames for y (e.g. sliced from
+                pitch_track of the whole recording)
             
         Returns:
             60-dimensional feature vector
@@ -121,37 +249,33 @@ class GenderDetector:
             if len(y) < 4000:
                 return np.zeros(60)
 
+            # 5. Zero Crossing Rate / 6. RMS Energy (first: they gate the rest)
+            zcr, rms = self._zcr_rms(y)
+            if rms.max() < self.SILENCE_RMS:
+                # Nothing voiced to measure; skip YIN/LPC/STFT (-> unknown)
+                return np.zeros(60)
+
+            # One magnitude STFT (librosa's default 2048/512 framing, which the
+            # model was trained on) feeds both the MFCCs and the centroid
+            S = np.abs(librosa.stft(y, n_fft=self.YIN_FRAME, hop_length=self.YIN_HOP))
+
             # 1. MFCCs (20 coefficients)
-            mfcc = librosa.feature.mfcc(y=y, sr=self.sample_rate, n_mfcc=20)
+            mel = librosa.feature.melspectrogram(S=S ** 2, sr=self.sample_rate)
+            mfcc = librosa.feature.mfcc(S=librosa.power_to_db(mel), n_mfcc=20)
             
             # 2. Pitch (F0) using YIN algorithm
-            try:
-                f0 = librosa.yin(y, fmin=50, fmax=300)
-                f0 = f0[~np.isnan(f0)]
-                if len(f0) == 0:
-                    f0 = np.zeros(1)
-            except:
-                f0 = np.zeros(1)
+            pitch = self._pitch_stats(y, f0)
 
             # 3. Formants via Linear Predictive Coding
-            try:
-                lpc = librosa.lpc(y, order=12)
-            except:
-                lpc = np.zeros(13)
+            lpc = self._lpc(y)
 
             # 4. Spectral Centroid
-            spec = librosa.feature.spectral_centroid(y=y, sr=self.sample_rate)
-
-            # 5. Zero Crossing Rate
-            zcr = librosa.feature.zero_crossing_rate(y)
-
-            # 6. RMS Energy
-            rms = librosa.feature.rms(y=y)
+            spec = librosa.feature.spectral_centroid(S=S, sr=self.sample_rate)
 
             # Combine all features
             features = np.concatenate([
                 mfcc.mean(axis=1), mfcc.std(axis=1),
-                [f0.mean()], [f0.std() if len(f0) > 1 else 0.0],
+                pitch,
                 lpc,
                 [spec.mean()], [spec.std()],
                 [zcr.mean()], [zcr.std()],
@@ -168,6 +292,226 @@ class GenderDetector:
             logger.error(f"Error extracting features: {e}")
             return np.zeros(60)
 
+    @staticmethod
+    def _pitch_stats(y: np.ndarray, f0: Optional[np.ndarray] = None) -> np.ndarray:
+        """[mean, std] of the YIN F0 track (zeros if it can't be estimated)."""
+        try:
+            if f0 is None:
+                f0 = librosa.yin(y, fmin=50, fmax=300)
+            f0 = f0[~np.isnan(f0)]
+            if len(f0) == 0:
+                f0 = np.zeros(1)
+        except:
+            f0 = np.zeros(1)
+        return np.array([f0.mean(), f0.std() if len(f0) > 1 else 0.0])
+
+    # Input is peak-normalised, so a frame RMS this far below the peak
+    # everywhere means digital silence or an isolated click
+    SILENCE_RMS = 0.01
+
+    @classmethod
+    def _zcr_rms(cls, y: np.ndarray):
+        """
+        Per-frame zero crossing rate and RMS, equal to librosa's
+        zero_crossing_rate / rms with their defaults (2048/512, centred).
+        
+        Frames overlap 4x, so both are read off running sums of sign flips
+        and squared samples: one pass over the signal instead of a framed
+        copy per feature.
+        """
+        n_fft, hop = cls.YIN_FRAME, cls.YIN_HOP
+        half = n_fft // 2
+        starts = np.arange(1 + len(y) // hop) * hop
+
+        # ZCR pads with edge values; |x| <= 1e-10 counts as zero (positive)
+        padded = np.pad(y, half, mode="edge")
+        neg = np.signbit(np.where(np.abs(padded) <= 1e-10, 0.0, padded))
+        flips = np.concatenate([[0], np.cumsum(neg[1:] != neg[:-1])])
+        zcr = (flips[starts + n_fft - 1] - flips[starts]) / n_fft
+
+        # RMS pads with zeros
+        power = np.concatenate([[0.0], np.cumsum(np.pad(y, half).astype(np.float64) ** 2)])
+        rms = np.sqrt(np.maximum(power[starts + n_fft] - power[starts], 0.0) / n_fft)
+        return zcr, rms
+
+    @staticmethod
+    def _lpc(y: np.ndarray) -> np.ndarray:
+        try:
+            return librosa.lpc(y, order=12)
+        except:
+            return np.zeros(13)
+
+    # Items per GPU feature batch (each padded to the longest in its batch)
+    FEATURE_BATCH = 64
+
+    def _gpu_feature_bank(self):
+        """
+        Device and constant tensors for _spectral_batch, built on first use;
+        None without torch or CUDA.
+        """
+        if self._feature_bank is None:
+            self._feature_bank = False
+            try:
+                import torch
+                import scipy.fft
+
+                if torch.cuda.is_available():
+                    dev = torch.device("cuda")
+                    n_fft = self.YIN_FRAME  # librosa's default frame for every feature
+                    mel_fb = librosa.filters.mel(sr=self.sample_rate, n_fft=n_fft, n_mels=128)
+                    # mfcc = DCT-II (ortho) of the log-mel columns, first 20 rows
+                    dct = scipy.fft.dct(np.eye(128), type=2, norm="ortho", axis=0)[:20]
+                    freqs = librosa.fft_frequencies(sr=self.sample_rate, n_fft=n_fft)
+                    self._feature_bank = (
+                        dev,
+                        torch.hann_window(n_fft, device=dev),
+                        torch.as_tensor(mel_fb, dtype=torch.float32, device=dev),
+                        torch.as_tensor(dct, dtype=torch.float32, device=dev),
+                        torch.as_tensor(freqs, dtype=torch.float32, device=dev),
+                    )
+            except ImportError:
+                pass
+        return self._feature_bank or None
+
+    def __getstate__(self):
+        # Pool workers get the model only; CUDA tensors are rebuilt on demand
+        state = self.__dict__.copy()
+        state["_feature_bank"] = None
+        return state
+
+    @property
+    def gpu_features(self) -> bool:
+        """Whether extract_features_batch runs its spectral features on CUDA."""
+        return self._gpu_feature_bank() is not None
+
+    def _spectral_batch(self, ys: List[np.ndarray], bank):
+        """
+        MFCC mean/std, spectral centroid mean/std, ZCR mean/std and RMS mean
+        for a batch, framed like librosa's defaults (n_fft 2048, hop 512,
+        centred): (B, 45), plus each item's peak frame RMS (B,) for the
+        silence gate. Frames past each item's end are masked out.
+        """
+        import torch
+        import torch.nn.functional as F
+
+        dev, window, mel_fb, dct, freqs = bank
+        n_fft, hop = self.YIN_FRAME, self.YIN_HOP
+        half = n_fft // 2
+
+        lengths = np.array([len(y) for y in ys])
+        T = int(lengths.max())
+        batch = np.zeros((len(ys), T), dtype=np.float32)
+        # librosa pads ZCR frames with edge values, the rest with zeros
+        edge = np.zeros((len(ys), T + 2 * half), dtype=np.float32)
+        for i, y in enumerate(ys):
+            batch[i, :len(y)] = y
+            edge[i, :len(y) + 2 * half] = np.pad(y, half, mode="edge")
+
+        with torch.inference_mode():
+            wav = torch.from_numpy(batch).pin_memory().to(dev, non_blocking=True)
+            wav_edge = torch.from_numpy(edge).pin_memory().to(dev, non_blocking=True)
+
+            n_frames = torch.as_tensor(1 + lengths // hop, device=dev)
+            mask = (torch.arange(1 + T // hop, device=dev)[None, :] < n_frames[:, None]).float()
+            count = mask.sum(-1)
+
+            def stats(x):
+                w = mask if x.dim() == 2 else mask[:, None, :]
+                c = count if x.dim() == 2 else count[:, None]
+                mean = (x * w).sum(-1) / c
+                std = ((((x - mean[..., None]) ** 2) * w).sum(-1) / c).sqrt()
+                return mean, std
+
+            # One STFT feeds MFCC and centroid
+            mag = torch.stft(wav, n_fft, hop_length=hop, window=window, center=True,
+                             pad_mode="constant", return_complex=True).abs()  # (B, 1025, F)
+
+            # MFCC: mel power -> dB (ref 1, amin 1e-10, top_db 80 below the
+            # item's own peak; padding only adds quieter frames) -> DCT
+            log_mel = 10.0 * torch.log10(torch.matmul(mel_fb, mag ** 2).clamp(min=1e-10))
+            peak = log_mel.amax(dim=(1, 2), keepdim=True)
+            mfcc = torch.matmul(dct, torch.maximum(log_mel, peak - 80.0))  # (B, 20, F)
+            mfcc_mean, mfcc_std = stats(mfcc)
+
+            # Centroid over the magnitude spectrum; near-empty frames stay 0
+            total = mag.sum(1)
+            weighted = torch.matmul(freqs, mag)
+            tiny = float(np.finfo(np.float32).tiny)
+            centroid = torch.where(total >= tiny, weighted / total.clamp(min=tiny), weighted)
+            spec_mean, spec_std = stats(centroid)
+
+            # RMS: windowless time-domain frames, as a mean pool of squares
+            power = F.pad(wav, (half, half)) ** 2
+            rms = F.avg_pool1d(power[:, None, :], n_fft, hop)[:, 0].sqrt()
+            rms_mean, _ = stats(rms)
+            rms_peak = (rms * mask).amax(-1)
+
+            # ZCR: sign changes (|x| <= 1e-10 counts as 0, i.e. positive) over
+            # the frame_length - 1 sample pairs, divided by frame_length
+            neg = torch.where(wav_edge.abs() <= 1e-10, torch.zeros_like(wav_edge), wav_edge) < 0
+            flips = (neg[:, 1:] != neg[:, :-1]).float()
+            zcr = F.avg_pool1d(flips[:, None, :], n_fft - 1, hop)[:, 0] * ((n_fft - 1) / n_fft)
+            zcr_mean, zcr_std = stats(zcr)
+
+            out = torch.cat([
+                mfcc_mean, mfcc_std,
+                spec_mean[:, None], spec_std[:, None],
+                zcr_mean[:, None], zcr_std[:, None],
+                rms_mean[:, None]
+            ], dim=1)
+
+        return out.cpu().numpy(), rms_peak.cpu().numpy()
+
+    def extract_features_batch(self, ys: List[np.ndarray],
+                               f0s: Optional[List[Optional[np.ndarray]]] = None) -> np.ndarray:
+        """
+        extract_features for many preprocessed signals at once.
+        
+        On CUDA the STFT/frame features (MFCC, spectral centroid, ZCR, RMS)
+        run FEATURE_BATCH items per padded batch; LPC and YIN pitch stay per
+        item on the CPU. Without CUDA this is extract_features per item.
+        
+        Args:
+            ys: Outputs of preprocess_audio
+            f0s: Optional precomputed YIN frames per item
+            
+        Returns:
+            (N, 60) feature matrix, rows in input order
+        """
+        out = np.zeros((len(ys), 60), dtype=np.float32)
+        f0s = f0s if f0s is not None else [None] * len(ys)
+
+        bank = self._gpu_feature_bank()
+        if bank is None:
+            for i, y in enumerate(ys):
+                out[i] = self.extract_features(y, f0=f0s[i])
+            return out
+
+        # Shorter than 0.25s stays a zero row, as in extract_features
+        rows = [i for i, y in enumerate(ys) if len(y) >= 4000]
+        for b in range(0, len(rows), self.FEATURE_BATCH):
+            idx = rows[b:b + self.FEATURE_BATCH]
+            try:
+                spectral, rms_peak = self._spectral_batch([ys[i] for i in idx], bank)
+            except Exception as e:
+                logger.error(f"Batched feature extraction failed, falling back per item: {e}")
+                for i in idx:
+                    out[i] = self.extract_features(ys[i], f0=f0s[i])
+                continue
+
+            for j, i in enumerate(idx):
+                # Silent rows (gated on the batch's RMS) skip YIN/LPC and
+                # stay zero, as in extract_features
+                if rms_peak[j] < self.SILENCE_RMS:
+                    continue
+                out[i] = np.concatenate([
+                    spectral[j, :40],
+                    self._pitch_stats(ys[i], f0s[i]),
+                    self._lpc(ys[i]),
+                    spectral[j, 40:]
+                ])
+        return out
+
     def predict(self, audio: Union[str, np.ndarray], prob_threshold: float = 0.55) -> Dict[str, Any]:
         """
         Predict gender from audio with confidence score.
@@ -191,56 +535,123 @@ class GenderDetector:
             # 1. Feature Extraction
             y = self.preprocess_audio(audio)
             features = self.extract_features(y)
+        except Exception as e:
+            logger.error(f"Gender prediction error: {e}")
+            return {"gender": "unknown", "confidence": 0.0}
+
+        return self.classify(features, prob_threshold)
+
+    def classify(self, features: np.ndarray, prob_threshold: float = 0.55) -> Dict[str, Any]:
+        """
+        Predict gender from an already extracted 60-dimensional feature vector.
+        
+        Args:
+            features: Output of extract_features
+            prob_threshold: Minimum confidence threshold (default: 0.55)
+            
+        Returns:
+            Dictionary with 'gender', 'confidence', and 'pitch' keys
+        """
+        return self.classify_batch(np.asarray(features).reshape(1, -1), prob_threshold)[0]
+
+    def classify_batch(self, features: np.ndarray, prob_threshold: float = 0.55) -> List[Dict[str, Any]]:
+        """
+        Predict gender for many feature vectors with a single model call.
+        
+        Args:
+            features: (N, 60) matrix, one extract_features row per sample
+            prob_threshold: Minimum confidence threshold (default: 0.55)
             
-            if np.all(features == 0):
-                return {"gender": "unknown", "confidence": 0.0}
-
-            # 2. ML Prediction
-            # Convert to DataFrame if model has feature names to avoid UserWarning
-            features_reshaped = features.reshape(1, -1)
-            if hasattr(self.model, 'feature_name_'):
-                features_input = pd.DataFrame(features_reshaped, columns=self.model.feature_name_)
+        Returns:
+            List of prediction dictionaries, in row order
+        """
+        n = len(features)
+        if self.model is None or self.label_encoder is None:
+            return [{"gender": "unknown", "confidence": 0.0} for _ in range(n)]
+
+        try:
+            results = [{"gender": "unknown", "confidence": 0.0} for _ in range(n)]
+
+            # Rows of zeros are failed/too-short extractions
+            X = np.ascontiguousarray(features, dtype=np.float32)
+            valid_rows = np.flatnonzero(np.any(X != 0, axis=1))
+            if len(valid_rows) == 0:
+                return results
+
+            # 2. ML Prediction (one call for the whole batch)
+            X_valid = X[valid_rows]
+            if self.booster_ is not None:
+                # Trees are traversed in parallel across rows on this
+                # worker's cores (Celery workers are pinned to a slice)
+                prob_dist = self.booster_.predict(
+                    X_valid, num_iteration=getattr(self.model, 'best_iteration_', None),
+                    num_threads=_available_cores()
+                )
+                if prob_dist.ndim == 1:
+                    # Binary objective: P(class 1) only
+                    prob_dist = np.column_stack([1.0 - prob_dist, prob_dist])
             else:
-                features_input = features_reshaped
-                
-            prob_dist = self.model.predict_proba(features_input)[0]
-            class_idx = np.argmax(prob_dist)
-            model_confidence = float(prob_dist[class_idx])
-            model_gender = self.label_encoder.inverse_transform([class_idx])[0]
+                # Convert to DataFrame if model has feature names to avoid UserWarning
+                if hasattr(self.model, 'feature_name_'):
+                    features_input = pd.DataFrame(X_valid, columns=self.model.feature_name_)
+                else:
+                    features_input = X_valid
+                prob_dist = self.model.predict_proba(features_input)
+            class_idx = prob_dist.argmax(axis=1)
+            model_genders = self.classes_[class_idx]
+            confidences = prob_dist[np.arange(len(class_idx)), class_idx]
 
-            # 3. Pitch-based Sanity Check
             # Pitch mean is at index 40 in the 60-dim vector
-            pitch_mean = features[40]
-            final_gender = model_gender
-            
-            # Biological pitch ranges: Female >165Hz, Male <155Hz
-            if pitch_mean > 190 and model_gender != 'female':
-                final_gender = 'female'
-                model_confidence = max(model_confidence, 0.85)
-            elif 50 < pitch_mean < 100 and model_gender != 'male':
-                final_gender = 'male'
-                model_confidence = max(model_confidence, 0.85)
-
-            # 4. Confidence Gating
-            if model_confidence < prob_threshold:
-                # Use pitch as fallback for very clear cases
-                if pitch_mean > 200:
-                    return {"gender": "female", "confidence": 0.60, "pitch": float(pitch_mean)}
-                elif 50 < pitch_mean < 95:
-                    return {"gender": "male", "confidence": 0.60, "pitch": float(pitch_mean)}
-                
-                logger.debug(f"Confidence too low ({model_confidence:.2f} < {prob_threshold})")
-                return {"gender": "unknown", "confidence": model_confidence}
-
-            return {
-                "gender": final_gender,
-                "confidence": model_confidence,
-                "pitch": float(pitch_mean)
-            }
+            batch = self._apply_pitch_rules_batch(
+                model_genders, confidences, X_valid[:, 40], prob_threshold
+            )
+            for row, result in zip(valid_rows, batch):
+                results[row] = result
+            return results
             
         except Exception as e:
             logger.error(f"Gender prediction error: {e}")
-            return {"gender": "unknown", "confidence": 0.0}
+            return [{"gender": "unknown", "confidence": 0.0} for _ in range(n)]
+
+    @staticmethod
+    def _apply_pitch_rules_batch(model_genders: np.ndarray, confidences: np.ndarray,
+                                 pitch_means: np.ndarray, prob_threshold: float) -> List[Dict[str, Any]]:
+        """
+        Pitch-based sanity check and confidence gating on top of the model
+        output, evaluated as array masks over the batch; only the result
+        dicts are built per row.
+        """
+        genders = np.asarray(model_genders).astype(object)
+        confidence = np.asarray(confidences, dtype=np.float64).copy()
+        pitch = np.asarray(pitch_means, dtype=np.float64)
+
+        # 3. Pitch-based Sanity Check
+        # Biological pitch ranges: Female >165Hz, Male <155Hz
+        to_female = (pitch > 190) & (genders != 'female')
+        to_male = ~to_female & (pitch > 50) & (pitch < 100) & (genders != 'male')
+        overridden = to_female | to_male
+        genders[to_female] = 'female'
+        genders[to_male] = 'male'
+        confidence[overridden] = np.maximum(confidence[overridden], 0.85)
+
+        # 4. Confidence Gating, with pitch as fallback for very clear cases
+        low = confidence < prob_threshold
+        fallback_female = low & (pitch > 200)
+        fallback_male = low & ~fallback_female & (pitch > 50) & (pitch < 95)
+        unknown = low & ~fallback_female & ~fallback_male
+        if unknown.any():
+            logger.debug(f"Confidence too low (< {prob_threshold}) for {int(unknown.sum())} samples")
+        genders[fallback_female] = 'female'
+        genders[fallback_male] = 'male'
+        confidence[fallback_female | fallback_male] = 0.60
+
+        results = []
+        for g, c, p, u in zip(genders.tolist(), confidence.tolist(), pitch.tolist(), unknown.tolist()):
+            if u:
+                results.append({"gender": "unknown", "confidence": c})
+            else:
+                results.append({"gender": g, "confidence": c, "pitch": p})
+        return results
 
     def batch_predict(self, audio_list: List[Union[str, np.ndarray]]) -> List[Dict[str, Any]]:
         """
@@ -252,27 +663,190 @@ class GenderDetector:
         Returns:
             List of prediction dictionaries
         """
-        return [self.predict(audio) for audio in audio_list]
+        if self.model is None or self.label_encoder is None:
+            return [{"gender": "unknown", "confidence": 0.0} for _ in audio_list]
+
+        signals = []
+        for audio in audio_list:
+            try:
+                signals.append(self.preprocess_audio(audio))
+            except Exception as e:
+                logger.error(f"Gender prediction error: {e}")
+                signals.append(np.zeros(0, dtype=np.float32))  # zero row -> unknown
+
+        # One (N, 60) matrix and a single model call instead of predict() per item
+        return self.classify_batch(self.extract_features_batch(signals))
+
+
+def _available_cores() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _feature_cache_path(y: np.ndarray, sample_rate: int) -> str:
+    h = hashlib.sha1(np.ascontiguousarray(y, dtype=np.float32).data)
+    h.update(f"{sample_rate}:{FEATURE_CACHE_VERSION}".encode())
+    return os.path.join(FEATURE_CACHE_DIR, f"{h.hexdigest()}.npy")
+
+
+def _load_cached_features(path: str) -> Optional[np.ndarray]:
+    try:
+        features = np.load(path)
+    except (OSError, ValueError):
+        return None
+    if features.shape != (60,):
+        return None
+    try:
+        os.utime(path)  # mark as recently used for eviction
+    except OSError:
+        pass
+    return features
+
+
+def _store_features(path: str, features: np.ndarray):
+    """Write one vector to the cache; failures only cost a future hit."""
+    global _feature_cache_stores
+    # Zero rows are failed extractions, which may succeed next time
+    if not np.any(features):
+        return
+    try:
+        os.makedirs(FEATURE_CACHE_DIR, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, np.asarray(features, dtype=np.float32))
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Could not cache gender features: {e}")
+        return
+
+    with _feature_cache_lock:
+        _feature_cache_stores += 1
+        evict = _feature_cache_stores >= FEATURE_CACHE_EVICT_EVERY
+        if evict:
+            _feature_cache_stores = 0
+    if evict:
+        # Same least-recently-used policy and helper as the audio cache
+        from pathlib import Path
+        from app.config import settings
+        from app.services.audio_extractor import _evict_cache
+        _evict_cache(Path(FEATURE_CACHE_DIR), settings.GENDER_FEATURE_CACHE_MAX_MB << 20)
 
 
-def detect_gender_for_segments(segments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def _cached_features_batch(detector: "GenderDetector", signals: List[np.ndarray]) -> np.ndarray:
+    """
+    (N, 60) features for preprocessed signals: cache hits are read from
+    FEATURE_CACHE_DIR, the misses go through extract_features_batch together.
+    """
+    out = np.zeros((len(signals), 60), dtype=np.float32)
+    paths = [_feature_cache_path(y, detector.sample_rate) for y in signals]
+
+    misses = []
+    for i, path in enumerate(paths):
+        features = _load_cached_features(path)
+        if features is None:
+            misses.append(i)
+        else:
+            out[i] = features
+
+    if misses:
+        out[misses] = detector.extract_features_batch([signals[i] for i in misses])
+        for i in misses:
+            _store_features(paths[i], out[i])
+    return out
+
+
+def extract_gender_features(audio_path: str) -> np.ndarray:
+    """
+    Extract the 60-dim gender feature vector for one audio file.
+    
+    Module-level so it can be shipped to process pool workers; each worker
+    builds its own GenderDetector once. Returns zeros on failure, which
+    classify() maps to "unknown".
+    """
+    detector = get_gender_detector()
+    try:
+        y = detector.preprocess_audio(audio_path)
+        path = _feature_cache_path(y, detector.sample_rate)
+        features = _load_cached_features(path)
+        if features is None:
+            features = detector.extract_features(y)
+            _store_features(path, features)
+        return features
+    except Exception as e:
+        logger.error(f"Feature extraction failed for {audio_path}: {e}")
+        return np.zeros(60)
+
+
+def extract_gender_features_batch(audio_paths: List[str]) -> np.ndarray:
+    """
+    (N, 60) gender features for many files through extract_features_batch.
+    
+    Decoding and preprocessing run on a thread pool (soundfile/resampling
+    release the GIL); files that fail to load get a zero row.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    detector = get_gender_detector()
+
+    def load(path):
+        try:
+            return detector.preprocess_audio(path)
+        except Exception as e:
+            logger.error(f"Feature extraction failed for {path}: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as ex:
+        signals = list(ex.map(load, audio_paths))
+
+    out = np.zeros((len(audio_paths), 60), dtype=np.float32)
+    loaded = [i for i, y in enumerate(signals) if y is not None]
+    if loaded:
+        out[loaded] = _cached_features_batch(detector, [signals[i] for i in loaded])
+    return out
+
+
+def detect_gender_for_segments(segments: List[Dict[str, Any]],
+                               default_gender: Optional[str] = None) -> List[Dict[str, Any]]:
     """
     Detect gender for a list of audio segments.
     
     Args:
         segments: List of segment dictionaries with 'audio_path' or 'audio_data' keys
+        default_gender: Written instead of "unknown" for segments the model
+            can't decide (silent, too short, low confidence); None keeps "unknown"
         
     Returns:
         Updated segments with 'gender' and 'gender_confidence' fields
     """
     detector = get_gender_detector()
     
+    targets, signals = [], []
     for seg in segments:
-        audio = seg.get('audio_path') or seg.get('audio_data')
-        if audio is not None:
-            result = detector.predict(audio)
-            seg['gender'] = result['gender']
-            seg['gender_confidence'] = result['confidence']
+        audio = seg.get('audio_path')
+        if audio is None:
+            audio = seg.get('audio_data')
+        if audio is None:
+            continue
+        try:
+            y = detector.preprocess_audio(audio)
+        except Exception as e:
+            logger.error(f"Gender prediction error: {e}")
+            y = np.zeros(0, dtype=np.float32)  # zero row -> unknown
+        targets.append(seg)
+        signals.append(y)
+
+    if not targets:
+        return segments
+
+    # One (N, 60) matrix and a single model call for all segments
+    features = _cached_features_batch(detector, signals)
+    for seg, result in zip(targets, detector.classify_batch(features)):
+        gender = result['gender']
+        if gender == 'unknown' and default_gender is not None:
+            gender = default_gender
+        seg['gender'] = gender
+        seg['gender_confidence'] = result['confidence']
     
     return segments
     
@@ -2,7 +2,7 @@ import os
 import re
 import logging
 import urllib.request
-from typing import Tuple
+from typing import List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -55,6 +55,14 @@ class LanguageIdentifier:
 
         return cls._model
 
+    # fastText ISO-639-3 labels -> ISO-639-1 codes used by the pipeline
+    LANG_MAP = {
+        'eng': 'en', 'hin': 'hi', 'tel': 'te', 'tam': 'ta', 'kan': 'kn',
+        'mal': 'ml', 'mar': 'mr', 'guj': 'gu', 'ben': 'bn', 'pan': 'pa',
+        'deu': 'de', 'fra': 'fr', 'spa': 'es', 'por': 'pt', 'ita': 'it',
+        'rus': 'ru', 'jpn': 'ja', 'kor': 'ko', 'zho': 'zh', 'ara': 'ar'
+    }
+
     @staticmethod
     def identify(text: str, whisper_hint: str = None, whisper_prob: float = 0.0) -> Tuple[str, float, str]:
         text = text.strip()
@@ -79,19 +87,68 @@ class LanguageIdentifier:
                 t_lang = predictions[0][0].replace('__label__', '')
                 t_conf = float(predictions[1][0])
 
-                lang_map = {
-                    'eng': 'en', 'hin': 'hi', 'tel': 'te', 'tam': 'ta', 'kan': 'kn',
-                    'mal': 'ml', 'mar': 'mr', 'guj': 'gu', 'ben': 'bn', 'pan': 'pa',
-                    'deu': 'de', 'fra': 'fr', 'spa': 'es', 'por': 'pt', 'ita': 'it',
-                    'rus': 'ru', 'jpn': 'ja', 'kor': 'ko', 'zho': 'zh', 'ara': 'ar'
-                }
-
-                text_lang = lang_map.get(t_lang, t_lang[:2])
+                text_lang = LanguageIdentifier.LANG_MAP.get(t_lang, t_lang[:2])
                 text_conf = t_conf
 
             except Exception as e:
                 logger.warning(f"FastText failed: {e}")
 
+        return LanguageIdentifier._resolve(text_lang, text_conf, whisper_hint, whisper_prob)
+
+    @staticmethod
+    def identify_batch(texts: List[str], whisper_hints: Optional[List[str]] = None,
+                       whisper_probs: Optional[List[float]] = None) -> List[Tuple[str, float, str]]:
+        """
+        Same decision rules as identify(), but all texts long enough for
+        fastText go through a single model.predict(list, k=1) call.
+        
+        Not called by the pipeline yet: stage 2 runs STT per chunk inside
+        parallel chains and Sarvam translates server-side, so no stage holds
+        all transcripts or consumes their language. It is the entry point
+        for a stage that does.
+        """
+        n = len(texts)
+        whisper_hints = whisper_hints or [None] * n
+        whisper_probs = whisper_probs or [0.0] * n
+
+        results: List[Optional[Tuple[str, float, str]]] = [None] * n
+        text_langs: List[Optional[str]] = [None] * n
+        text_confs = [0.0] * n
+        pending = []
+
+        for i, text in enumerate(texts):
+            text = text.strip()
+            if not text:
+                results[i] = ("unknown", 0.0, "empty")
+            elif len(text) < 3:
+                if whisper_hints[i]:
+                    results[i] = (whisper_hints[i], whisper_probs[i] or 0.7, "audio_probe_short")
+                else:
+                    results[i] = ("unknown", 0.0, "short_text")
+            else:
+                pending.append((i, text.replace('\n', ' ')))
+
+        model = LanguageIdentifier._load_model() if pending else None
+        if model:
+            try:
+                labels, probs = model.predict([t for _, t in pending], k=1)
+                for (i, _), label, prob in zip(pending, labels, probs):
+                    t_lang = label[0].replace('__label__', '')
+                    text_langs[i] = LanguageIdentifier.LANG_MAP.get(t_lang, t_lang[:2])
+                    text_confs[i] = float(prob[0])
+            except Exception as e:
+                logger.warning(f"FastText batch failed: {e}")
+
+        for i, _ in pending:
+            results[i] = LanguageIdentifier._resolve(
+                text_langs[i], text_confs[i], whisper_hints[i], whisper_probs[i]
+            )
+        return results
+
+    @staticmethod
+    def _resolve(text_lang: Optional[str], text_conf: float,
+                 whisper_hint: str = None, whisper_prob: float = 0.0) -> Tuple[str, float, str]:
+        """Combine the fastText result with the audio (Whisper) language hint."""
         # ---------- NO TEXT RESULT ----------
         if not text_lang:
             return whisper_hint or "unknown", whisper_prob or 0.0, "whisper_fallback_no_text"
@@ -19,3 +19,35 @@ class VideoAudioMerger:
 
         subprocess.run(cmd, check=True)
         return output
+
+    @staticmethod
+    def merge_pcm(video, pcm, sample_rate, output):
+        """merge() for an in-memory int16 (frames x channels) track, piped to FFmpeg's stdin."""
+
+        cmd = [
+            "ffmpeg","-y",
+            "-i", video,
+            "-f","s16le",
+            "-ar", str(sample_rate),
+            "-ac", str(pcm.shape[1]),
+            "-i","pipe:0",
+            "-map","0:v:0",
+            "-map","1:a:0",
+            "-c:v","copy",
+            "-c:a","aac",
+            "-shortest",
+            output
+        ]
+
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+        try:
+            proc.stdin.write(memoryview(pcm.astype("<i2", copy=False)).cast("B"))
+        except BrokenPipeError:
+            # FFmpeg exited early; its return code carries the failure
+            pass
+        finally:
+            proc.stdin.close()
+
+        if proc.wait() != 0:
+            raise subprocess.CalledProcessError(proc.returncode, cmd)
+        return output
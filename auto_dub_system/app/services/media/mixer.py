@@ -1,13 +1,54 @@
 import subprocess
 
+import numpy as np
+import soundfile as sf
+
 class FastAudioMixer:
 
     @staticmethod
-    def mix(layers, output_path):
-
+    def mix_pcm(layers):
+        """
+        Mix equal-length layers in-process, as the amix filtergraph in mix()
+        does: gain 1 + volume/10 per layer, summed and scaled by 1/len(layers).
+        Returns (int16 frames x channels, sample_rate), or None when a layer
+        can't be read here, the layers don't share a rate / mono-stereo
+        layout, or their lengths differ (amix then raises the gain as inputs
+        end, which the filtergraph path reproduces).
+        """
         if not layers:
             raise ValueError("No audio layers")
 
+        try:
+            infos = [sf.info(layer["path"]) for layer in layers]
+        except RuntimeError:
+            # Not readable by libsndfile (e.g. compressed); FFmpeg decodes it
+            return None
+        sr = infos[0].samplerate
+        channels = max(info.channels for info in infos)
+        if any(info.samplerate != sr for info in infos) or \
+                any(info.channels not in (1, channels) for info in infos) or \
+                any(info.frames != infos[0].frames for info in infos):
+            return None
+
+        mixed = np.zeros((infos[0].frames, channels), dtype=np.float32)
+        for layer in layers:
+            data, _ = sf.read(layer["path"], dtype="float32", always_2d=True)
+            gain = (1 + layer.get("volume", 0) / 10) / len(layers)
+            # Mono layers broadcast across every output channel
+            mixed[:len(data)] += data * gain
+
+        np.clip(mixed, -1.0, 32767 / 32768, out=mixed)
+        return (mixed * 32768).astype(np.int16), sr
+
+    @staticmethod
+    def mix(layers, output_path):
+
+        mixed = FastAudioMixer.mix_pcm(layers)
+        if mixed is not None:
+            pcm, sr = mixed
+            sf.write(output_path, pcm, sr, subtype="PCM_16")
+            return output_path
+
         inputs = []
         filters = []
 
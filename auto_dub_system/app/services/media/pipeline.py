@@ -9,6 +9,12 @@ class RenderPipeline:
     @staticmethod
     def render(video_path, layers, output_path):
 
+        # Mix in-process and pipe the PCM straight into the mux, without a temp WAV
+        mixed = FastAudioMixer.mix_pcm(layers)
+        if mixed is not None:
+            pcm, sr = mixed
+            return VideoAudioMerger.merge_pcm(video_path, pcm, sr, output_path)
+
         with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
             temp_audio = tmp.name
 
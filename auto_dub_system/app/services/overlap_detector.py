@@ -7,9 +7,12 @@ Condition: Only runs if overlap == True
 
 import subprocess
 import logging
+import shutil
 from pathlib import Path
 from typing import List, Tuple, Optional
 
+from app.services.audio_extractor import _stderr_tail
+
 logger = logging.getLogger(__name__)
 
 
@@ -61,7 +64,8 @@ def _demucs(audio: Path, out_dir: Path) -> List[str]:
     try:
         cmd = ["demucs", "-n", "htdemucs", "--two-stems", "vocals",
                "-o", str(out_dir), str(audio)]
-        subprocess.run(cmd, check=True, capture_output=True, text=True)
+        # Progress bars go to stderr; keep it as bytes and decode only the tail on failure
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
         
         vocals = out_dir / "htdemucs" / audio.stem / "vocals.wav"
         if not vocals.exists():
@@ -74,7 +78,7 @@ def _demucs(audio: Path, out_dir: Path) -> List[str]:
     except FileNotFoundError:
         raise FileNotFoundError("Install: pip install demucs")
     except subprocess.CalledProcessError as e:
-        raise AudioSplitError(f"Demucs failed: {e.stderr}")
+        raise AudioSplitError(f"Demucs failed: {_stderr_tail(e.stderr)}")
 
 
 def _spleeter(audio: Path, out_dir: Path, speakers: int) -> List[str]:
@@ -83,7 +87,7 @@ def _spleeter(audio: Path, out_dir: Path, speakers: int) -> List[str]:
         stems = min(max(speakers, 2), 5)
         cmd = ["spleeter", "separate", "-p", f"spleeter:{stems}stems",
                "-o", str(out_dir), str(audio)]
-        subprocess.run(cmd, check=True, capture_output=True, text=True)
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
         
         result = sorted([str(f) for f in (out_dir / audio.stem).glob("*.wav")])
         if not result:
@@ -95,19 +99,12 @@ def _spleeter(audio: Path, out_dir: Path, speakers: int) -> List[str]:
     except FileNotFoundError:
         raise FileNotFoundError("Install: pip install spleeter")
     except subprocess.CalledProcessError as e:
-        raise AudioSplitError(f"Spleeter failed: {e.stderr}")
+        raise AudioSplitError(f"Spleeter failed: {_stderr_tail(e.stderr)}")
 
 
 def check_separation_tools() -> dict:
-    """Check available tools"""
-    tools = {}
-    for tool in ['demucs', 'spleeter']:
-        try:
-            subprocess.run([tool, "--help"], capture_output=True, check=True)
-            tools[tool] = True
-        except:
-            tools[tool] = False
-    return tools
+    """Check available tools (PATH lookup; `--help` would import torch/TF)"""
+    return {tool: shutil.which(tool) is not None for tool in ['demucs', 'spleeter']}
 
 
 # ============================================================================
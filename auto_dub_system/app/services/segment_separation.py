@@ -6,17 +6,34 @@ Time-based FFmpeg slicing using diarization timestamps
 import os
 import subprocess
 import shutil
+import threading
+import wave
 from typing import List, Dict, Tuple, Optional
 
 
 class SegmentSeparator:
     FFMPEG = "ffmpeg"
+    # Segments cut per FFmpeg process when batching (one decode, N outputs)
+    BATCH_SIZE = 32
+    # Our input is the extracted PCM WAV: the header alone describes the stream
+    PROBE_ARGS = ["-probesize", "32", "-analyzeduration", "0"]
+    _initialized = False
+    _init_lock = threading.Lock()
 
     # ---------------------------------------------------------
     # INITIALIZE FFMPEG
     # ---------------------------------------------------------
     @classmethod
     def initialize(cls):
+        # Resolve once per process; segment_separation calls this every run
+        with cls._init_lock:
+            if cls._initialized:
+                return
+            cls._resolve_ffmpeg()
+            cls._initialized = True
+
+    @classmethod
+    def _resolve_ffmpeg(cls):
         if not shutil.which("ffmpeg"):
             try:
                 import static_ffmpeg
@@ -48,13 +65,18 @@ class SegmentSeparator:
         duration: float,
         out_path: str,
         sample_rate: int,
-        channels: int
+        channels: int,
+        fast_probe: bool = True,
+        threads: int = 1
     ):
+        # Segments are short and cut many at a time: one thread each
         return [
             cls.FFMPEG,
             "-hide_banner",
             "-loglevel", "error",
+            "-threads", str(threads),
             "-ss", str(start),
+            *(cls.PROBE_ARGS if fast_probe else []),
             "-i", input_audio,
             "-t", str(duration),
             "-ac", str(channels),
@@ -64,6 +86,82 @@ class SegmentSeparator:
             out_path
         ]
 
+    # ---------------------------------------------------------
+    # BUILD BATCHED FFMPEG COMMAND
+    # ---------------------------------------------------------
+    @classmethod
+    def _batch_cmd(
+        cls,
+        input_audio: str,
+        cuts: List[Tuple[float, float, str]],
+        sample_rate: int,
+        channels: int,
+        fast_probe: bool = True,
+        threads: int = 1
+    ):
+        """One decode of input_audio, split into an atrim'd output per (start, end, out_path)."""
+        labels = "".join(f"[s{i}]" for i in range(len(cuts)))
+        graph = [f"[0:a]asplit={len(cuts)}{labels}"]
+        for i, (start, end, _) in enumerate(cuts):
+            graph.append(f"[s{i}]atrim=start={start}:end={end},asetpts=PTS-STARTPTS[o{i}]")
+
+        cmd = [
+            cls.FFMPEG,
+            "-hide_banner",
+            "-loglevel", "error",
+            "-threads", str(threads),
+            *(cls.PROBE_ARGS if fast_probe else []),
+            "-i", input_audio,
+            "-filter_complex", ";".join(graph),
+        ]
+        for i, (_, _, out_path) in enumerate(cuts):
+            cmd += [
+                "-map", f"[o{i}]",
+                "-ac", str(channels),
+                "-ar", str(sample_rate),
+                "-y",
+                out_path
+            ]
+        return cmd
+
+    # ---------------------------------------------------------
+    # PCM PASSTHROUGH (NO DECODE)
+    # ---------------------------------------------------------
+    @staticmethod
+    def _pcm_matches(input_audio: str, sample_rate: int, channels: int) -> bool:
+        """True if input_audio is a 16-bit PCM WAV already at the target format."""
+        try:
+            with wave.open(input_audio, "rb") as w:
+                return (w.getframerate() == sample_rate
+                        and w.getnchannels() == channels
+                        and w.getsampwidth() == 2)
+        except (wave.Error, EOFError, OSError):
+            # Not plain PCM WAV (e.g. WAVE_FORMAT_EXTENSIBLE): use FFmpeg
+            return False
+
+    @staticmethod
+    def _copy_cuts(input_audio: str, cuts: List[Tuple[float, float, str]]) -> set:
+        """Copy each (start, end, out_path) frame range straight into a new WAV."""
+        done = set()
+        with wave.open(input_audio, "rb") as src:
+            rate = src.getframerate()
+            total = src.getnframes()
+            for start, end, out_path in cuts:
+                first = min(int(round(start * rate)), total)
+                last = min(int(round(end * rate)), total)
+                if last <= first:
+                    continue
+                src.setpos(first)
+                frames = src.readframes(last - first)
+                try:
+                    with wave.open(out_path, "wb") as dst:
+                        dst.setparams(src.getparams())
+                        dst.writeframes(frames)
+                except OSError:
+                    continue
+                done.add(out_path)
+        return done
+
     # ---------------------------------------------------------
     # SAFE FFMPEG EXECUTION
     # ---------------------------------------------------------
@@ -92,7 +190,8 @@ class SegmentSeparator:
         sample_rate: int = 16000,
         channels: int = 1,
         skip_overlaps: bool = False,
-        min_duration: float = 0.15
+        min_duration: float = 0.15,
+        fast_probe: bool = True
     ) -> List[Dict]:
         """
         Returns list of segment metadata dictionaries.
@@ -107,7 +206,7 @@ class SegmentSeparator:
             raise ValueError("timestamps, speakers, overlap lists must be same length")
 
         os.makedirs(output_dir, exist_ok=True)
-        results = []
+        jobs = []
 
         for idx, ((start, end), speaker, overlap) in enumerate(
             zip(timestamps, speaker_labels, overlap_flags)
@@ -136,19 +235,49 @@ class SegmentSeparator:
                 f"seg_{idx:04d}_{speaker}.wav"
             )
 
-            cmd = cls._cmd(
-                input_audio=audio_path,
-                start=start,
-                duration=duration,
-                out_path=outfile,
-                sample_rate=sample_rate,
-                channels=channels
-            )
+            jobs.append((start, end, outfile, speaker, overlap))
 
-            success = cls._run_ffmpeg(cmd)
+        # The extracted audio is normally already PCM at the target rate and
+        # layout: then segments are plain frame ranges, copied without FFmpeg
+        cut_ok = set()
+        if jobs and cls._pcm_matches(audio_path, sample_rate, channels):
+            cut_ok = cls._copy_cuts(audio_path, [(start, end, outfile) for start, end, outfile, _, _ in jobs])
 
+        # Cut BATCH_SIZE segments per FFmpeg process; a batch that fails is
+        # retried one segment at a time so a single bad cut doesn't drop the rest
+        pending = [job for job in jobs if job[2] not in cut_ok]
+        batch_size = cls.BATCH_SIZE if len(pending) > 2 else 1
+        for b in range(0, len(pending), batch_size):
+            batch = pending[b:b + batch_size]
+            if len(batch) > 1:
+                cmd = cls._batch_cmd(
+                    input_audio=audio_path,
+                    cuts=[(start, end, outfile) for start, end, outfile, _, _ in batch],
+                    sample_rate=sample_rate,
+                    channels=channels,
+                    fast_probe=fast_probe
+                )
+                if cls._run_ffmpeg(cmd, retries=0):
+                    cut_ok.update(job[2] for job in batch)
+                    continue
+
+            for start, end, outfile, _, _ in batch:
+                cmd = cls._cmd(
+                    input_audio=audio_path,
+                    start=start,
+                    duration=end - start,
+                    out_path=outfile,
+                    sample_rate=sample_rate,
+                    channels=channels,
+                    fast_probe=fast_probe
+                )
+                if cls._run_ffmpeg(cmd):
+                    cut_ok.add(outfile)
+
+        results = []
+        for start, end, outfile, speaker, overlap in jobs:
             # Skip failed segments
-            if not success:
+            if outfile not in cut_ok:
                 continue
 
             # Validate output file
@@ -161,7 +290,7 @@ class SegmentSeparator:
                 "end_time": round(end, 3),
                 "speaker_no": speaker,
                 "overlap": overlap,
-                "duration": round(duration, 3)
+                "duration": round(end - start, 3)
             })
 
         return results
@@ -2,9 +2,15 @@
 Celery config.
 """
 
+import os
+import logging
+
 from celery import Celery
+from celery.signals import worker_process_init
 from app.config import settings
 
+logger = logging.getLogger(__name__)
+
 broker_url = settings.CELERY_BROKER_URL or settings.REDIS_URL
 backend_url = settings.CELERY_RESULT_BACKEND or settings.REDIS_URL
 
@@ -20,10 +26,27 @@ celery_app = Celery(
     ]
 )
 
+# Binary msgpack (with numpy support) for task payloads; JSON stays accepted
+# so messages queued by older producers still decode
+try:
+    import msgpack_numpy
+    from kombu.serialization import register
+
+    register(
+        "msgpack_np",
+        msgpack_numpy.packb,
+        msgpack_numpy.unpackb,
+        content_type="application/x-msgpack-numpy",
+        content_encoding="binary",
+    )
+    TASK_SERIALIZER = "msgpack_np"
+except ImportError:
+    TASK_SERIALIZER = "json"
+
 celery_app.conf.update(
-    task_serializer="json",
-    accept_content=["json"],
-    result_serializer="json",
+    task_serializer=TASK_SERIALIZER,
+    accept_content=[TASK_SERIALIZER, "json"],
+    result_serializer=TASK_SERIALIZER,
     timezone="UTC",
     enable_utc=True,
 
@@ -32,3 +55,41 @@ celery_app.conf.update(
     worker_prefetch_multiplier=1,
     task_acks_late=True,
 )
+
+if settings.DIARIZATION_DEVICE == "cuda":
+    # One process owns the GPU and its resident pyannote pipeline
+    celery_app.conf.update(worker_pool="solo", worker_concurrency=1)
+
+
+@worker_process_init.connect
+def _pin_worker_cpus(sender=None, **kwargs):
+    """
+    Pin each worker process to its share of the host's cores.
+
+    pyannote/torch/BLAS otherwise start one thread per core in every worker,
+    and several workers on the same host oversubscribe the CPU badly.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        cores = sorted(os.sched_getaffinity(0))
+    else:
+        cores = list(range(os.cpu_count() or 1))
+
+    count = max(1, settings.WORKER_COUNT)
+    per = max(1, len(cores) // count)
+    index = settings.WORKER_INDEX % count
+    subset = cores[index * per:(index + 1) * per] or cores
+
+    if count > 1 and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, subset)
+        logger.info(f"Worker {index}/{count} pinned to CPUs {subset}")
+
+    # Cap thread pools to the pinned cores (env vars cover subprocesses and
+    # libraries that have not initialised their pools yet)
+    threads = str(len(subset))
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = threads
+    try:
+        import torch
+        torch.set_num_threads(len(subset))
+    except ImportError:
+        pass
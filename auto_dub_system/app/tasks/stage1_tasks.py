@@ -1,4 +1,5 @@
 from celery import chain
+from celery.signals import worker_init, worker_process_init
 from app.tasks.celery_app import celery_app
 from app.config import settings
 import logging
@@ -15,12 +16,36 @@ warnings.filterwarnings("ignore", message=".*degrees of freedom.*")
 logger = logging.getLogger(__name__)
 
 from app.services.audio_extractor import audio_separator
-from app.services.diarization import speaker_diarization
+from app.services.diarization import speaker_diarization, get_diarizer
 from app.services.overlap_detector import overlapping_audio_split
 from app.services.segment_separation import SegmentSeparator
 from app.services.chunker import chunk_separation
 
 
+# ---------- WORKER WARM-UP ----------
+def _warm_diarizer():
+    try:
+        get_diarizer(token=settings.HF_TOKEN, device=settings.DIARIZATION_DEVICE,
+                     precision=settings.DIARIZATION_PRECISION)
+        logger.info("Diarization pipeline preloaded")
+    except Exception as e:
+        logger.warning(f"Diarization pipeline preload failed: {e}")
+
+
+@worker_process_init.connect
+def _preload_in_child(**kwargs):
+    # Prefork: load inside each child so CUDA is never initialised before fork
+    if settings.PRELOAD_DIARIZER:
+        _warm_diarizer()
+
+
+@worker_init.connect
+def _preload_in_solo(**kwargs):
+    # Solo pool has no children; the worker process itself runs the tasks
+    if settings.PRELOAD_DIARIZER and celery_app.conf.worker_pool == "solo":
+        _warm_diarizer()
+
+
 # ---------- TASK 1 ----------
 @celery_app.task
 def task_audio_separator(video_path):
@@ -30,7 +55,8 @@ def task_audio_separator(video_path):
 # ---------- TASK 2 ----------
 @celery_app.task
 def task_diarization(audio_path):
-    res = speaker_diarization(audio_path, use_auth_token=settings.HF_TOKEN)
+    res = speaker_diarization(audio_path, use_auth_token=settings.HF_TOKEN, device=settings.DIARIZATION_DEVICE,
+                              precision=settings.DIARIZATION_PRECISION)
     res["audio_path"] = audio_path
     return res
 
@@ -11,8 +11,9 @@ from app.services.tts import text_to_speech
 # ----------------- SERVICE WRAPPER TASKS -----------------
 
 @celery_app.task
-def task_gender(chunk):
-    # Determine gender for this chunk
+def task_gender(chunk, default_gender="male"):
+    # Determine gender for this chunk; default_gender is the job's fallback
+    # whenever detection cannot decide
     from app.services.gender_detection import get_gender_detector
     import logging
     logger = logging.getLogger(__name__)
@@ -25,11 +26,12 @@ def task_gender(chunk):
             return chunk
 
         gender_res = detector.predict(chunk["chunk_path"])
-        chunk["gender"] = gender_res.get("gender", "male")
+        predicted = gender_res.get("gender", "unknown")
+        chunk["gender"] = predicted if predicted in ("male", "female") else default_gender
         logger.info(f"Chunk {chunk['chunk_path']} predicted gender: {chunk['gender']} (conf: {gender_res.get('confidence', 0.0):.2f})")
     except Exception as e:
         logger.error(f"Gender detection failed for chunk {chunk['chunk_path']}: {e}")
-        chunk["gender"] = "male" # Default fallback
+        chunk["gender"] = default_gender # Default fallback
     return chunk
 
 @celery_app.task
@@ -83,17 +85,23 @@ def task_tts(align_result):
 # ----------------- STAGE 2 MASTER -----------------
 
 @celery_app.task(bind=True)
-def process_stage2(self, stage1_result):
+def process_stage2(self, stage1_result, gender="male"):
     """
     Receives diarization_data from stage1.
     Spawns parallel processing for chunks.
     Chains to stage3 for merging.
+
+    gender is the job's submitted gender, used for any speaker or chunk
+    detection cannot decide.
     """
     import logging
     logger = logging.getLogger(__name__)
     
     chunks = stage1_result.get("chunks", [])
     video_path = stage1_result.get("video_path")
+    default_gender = (gender or "male").lower()
+    if default_gender not in ("male", "female"):
+        default_gender = "male"
     
     logger.info(f"Stage 2 started for video: {video_path}, total chunks: {len(chunks)}")
     
@@ -106,36 +114,66 @@ def process_stage2(self, stage1_result):
 
     # --- Speaker-level Gender Majority Vote (Production Optimization) ---
     logger.info("Performing speaker-level gender majority vote...")
-    from app.services.gender_detection import get_gender_detector
-    from collections import Counter
+    from concurrent.futures.process import BrokenProcessPool
+    from app.services.gender_detection import (
+        get_gender_detector, extract_gender_features, extract_gender_features_batch,
+        get_feature_pool, discard_feature_pool
+    )
     
     detector = get_gender_detector()
     speaker_votes = {}
+
+    # Feature extraction (STFT, YIN, LPC) is CPU-bound and independent per chunk,
+    # so fan it out across cores; classification stays in this process.
+    # With CUDA the spectral features run batched on the GPU instead.
+    chunk_paths = [chunk["chunk_path"] for chunk in chunks]
+    if detector.gpu_features:
+        chunk_features = extract_gender_features_batch(chunk_paths)
+    else:
+        # Long-lived spawn pool shared with the chunker; None in prefork
+        # children, which can't start processes, so those extract serially
+        chunk_features = None
+        pool = get_feature_pool(detector)
+        if pool is not None:
+            try:
+                chunk_features = list(pool.map(extract_gender_features, chunk_paths, chunksize=4))
+            except (BrokenProcessPool, OSError) as e:
+                logger.warning(f"Feature pool failed ({e}), extracting serially")
+                discard_feature_pool()
+        if chunk_features is None:
+            chunk_features = [extract_gender_features(path) for path in chunk_paths]
     
-    for chunk in chunks:
+    # Stack into one contiguous (N, 60) matrix and classify in a single model call
+    import numpy as np
+    feature_matrix = np.empty((len(chunk_features), 60), dtype=np.float32)
+    for i, features in enumerate(chunk_features):
+        feature_matrix[i] = features
+    predictions = detector.classify_batch(feature_matrix)
+    
+    # Single pass: tally votes per speaker and track the running leader, so
+    # there is no second scan over the votes to find the majority
+    speaker_final_gender = {}
+    best_counts = {}
+    for chunk, res in zip(chunks, predictions):
         speaker = chunk.get("speaker_no", "unknown")
-        try:
-            res = detector.predict(chunk["chunk_path"])
-            gender = res.get("gender", "male")
-            if speaker not in speaker_votes:
-                speaker_votes[speaker] = []
-            speaker_votes[speaker].append(gender)
-        except Exception as e:
-            logger.error(f"Majority vote gender detection failed for chunk {chunk['chunk_path']}: {e}")
+        vote = res.get("gender")
+        if vote not in ("male", "female"):
+            # Undecided chunks don't vote; a speaker with no decided chunk
+            # falls back to the job's gender below
+            continue
+        tally = speaker_votes.setdefault(speaker, {})
+        count = tally[vote] = tally.get(vote, 0) + 1
+        if count > best_counts.get(speaker, 0):
+            best_counts[speaker] = count
+            speaker_final_gender[speaker] = vote
 
-    # Calculate final gender per speaker
-    speaker_final_gender = {}
-    for speaker, votes in speaker_votes.items():
-        if votes:
-            most_common = Counter(votes).most_common(1)[0][0]
-            speaker_final_gender[speaker] = most_common
-            logger.info(f"Speaker {speaker} final gender (majority vote): {most_common} (from {len(votes)} samples)")
-        else:
-            speaker_final_gender[speaker] = "male"
+    for speaker, tally in speaker_votes.items():
+        logger.info(f"Speaker {speaker} final gender (majority vote): {speaker_final_gender[speaker]} "
+                    f"(from {sum(tally.values())} samples)")
 
     # Assign final gender to all chunks
     for chunk in chunks:
-        chunk["gender"] = speaker_final_gender.get(chunk.get("speaker_no", "unknown"), "male")
+        chunk["gender"] = speaker_final_gender.get(chunk.get("speaker_no", "unknown"), default_gender)
         
     chunk_chains = []
     
@@ -143,7 +181,7 @@ def process_stage2(self, stage1_result):
         # Create a processing chain for each chunk
         # task_gender will now see the pre-assigned gender and skip repeated detection
         c = chain(
-            task_gender.s(chunk),
+            task_gender.s(chunk, default_gender),
             task_stt.s(),
             task_align.s(),
             task_tts.s()